@@ -0,0 +1,239 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import DATA_DIRECTORY, Instances, load_instance, to_table
+
+# Percentiles of the decode latency reported by the benchmarks
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+def scale_instance(instance: Dict, factor: int):
+    """
+        Function to build a synthetic instance with the charges of an instance repeated factor times, on the same
+        machines. The charges and casts of each copy get new indexes and are cast after the previous copy.
+    Args:
+        instance: dictionary of instance, of structured arrays or DataFrames
+        factor: int, number of copies of the charges
+
+    Returns:
+        instance: dictionary of the scaled instance, whose scaled tables are structured arrays
+    """
+    cast_plan = to_table(instance["Cast_plan"])
+    num_charges = len(cast_plan)
+    num_casts = int(cast_plan["CastID"].max())
+
+    scaled = dict(instance)
+    for table, offsets in (("Cast_plan", {"ChargeID": num_charges, "CastID": num_casts}),
+                           ("CC_Processing_Time", {"ChargeID": num_charges}),
+                           ("nonCC_Processing_Time", {"ChargeID": num_charges})):
+        # Rows of charges missing from the cast plan are dropped, they would clash with the charges of the copies
+        table_rows = to_table(instance[table])
+        rows = table_rows[np.isin(table_rows["ChargeID"], cast_plan["ChargeID"])]
+
+        copies = []
+        for copy_index in range(factor):
+            copied_rows = rows.copy()
+            for column, offset in offsets.items():
+                copied_rows[column] += copy_index * offset
+
+            copies.append(copied_rows)
+
+        scaled[table] = np.concatenate(copies)
+
+    return scaled
+
+
+def benchmark_instance(instance: Dict, decodes: int = 20, seed: int = 0):
+    """
+        Function to benchmark the decoding of an instance, with random permutations of the charges of stage 1
+    Args:
+        instance: dictionary of instance
+        decodes: int, number of timed decodes
+        seed: int, seed of the permutations and of the decoder
+
+    Returns:
+        results: dictionary of the size of the instance, the setup time, the decode throughput and latencies in
+            seconds, and the peak memory in bytes traced while building the simulation and decoding once
+    """
+    start = time.perf_counter()
+    simulation = Simulation(instance, name="benchmark", run=False, headless=True, seed=seed)
+    setup_time = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    charges = simulation.charges.in_stage(0)
+    permutations = [rng.permutation(charges).tolist() for _ in range(decodes)]
+
+    simulation.decode(permutations[0], incremental=False)  # Warm up
+
+    latencies = []
+    for zeta in permutations:
+        start = time.perf_counter()
+        simulation.decode(zeta, incremental=False)
+        latencies.append(time.perf_counter() - start)
+
+    latencies = np.array(latencies)
+
+    # Traced separately, as tracing slows down the decodes
+    tracemalloc.start()
+    try:
+        Simulation(instance, name="benchmark", run=False, headless=True, seed=seed).decode(permutations[0])
+        _, peak_memory = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    results = dict(simulation.instance_data)
+    results.update({"setup_time": setup_time,
+                    "decodes": decodes,
+                    "decodes_per_second": decodes / latencies.sum(),
+                    "latency_mean": float(latencies.mean()),
+                    "latency_max": float(latencies.max()),
+                    "peak_memory": peak_memory})
+    for percentile in LATENCY_PERCENTILES:
+        results[f"latency_p{percentile}"] = float(np.percentile(latencies, percentile))
+
+    return results
+
+
+def benchmark_loading(instance_path: str, repeats: int = 3):
+    """
+        Function to benchmark the loading of an instance folder, parsing the csv files and reading the binary cache
+    Args:
+        instance_path: path to the instance folder
+        repeats: int, number of loads, the fastest one is reported
+
+    Returns:
+        results: dictionary of the load times in seconds, without ("load_time") and with ("cached_load_time")
+            the binary cache
+    """
+    load_time = min(_timed(load_instance, instance_path, use_cache=False) for _ in range(repeats))
+
+    load_instance(instance_path)  # Write the cache if needed
+    cached_load_time = min(_timed(load_instance, instance_path) for _ in range(repeats))
+
+    return {"load_time": load_time, "cached_load_time": cached_load_time}
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def run_benchmarks(paths: Sequence[str] = (), names: List[str] = None, decodes: int = 20,
+                   scales: Sequence[int] = (2, 4), seed: int = 0, output: str = None):
+    """
+        Function to benchmark the loading and decoding of the instances, and of synthetic instances scaled up from
+        the largest one
+    Args:
+        paths: directories of instance folders, or instance folders themselves (continuous_casting/data if none)
+        names: list of names of the instances to benchmark (all if None)
+        decodes: int, number of timed decodes per instance
+        scales: factors of the synthetic instances
+        seed: int, seed of the permutations and of the decoder
+        output: path of the JSON file to save the results to (optional)
+
+    Returns:
+        results: dictionary of the environment and of the results of each instance, indexed by instance name
+    """
+    instances = Instances(*paths)
+    names = list(instances) if names is None else names
+
+    results = {"environment": {"python": platform.python_version(),
+                               "numpy": np.__version__,
+                               "platform": platform.platform(),
+                               "decodes": decodes,
+                               "seed": seed},
+               "instances": {}}
+
+    for name in names:
+        results["instances"][name] = benchmark_loading(instances.path(name))
+        results["instances"][name].update(benchmark_instance(instances[name], decodes, seed))
+
+    if names and scales:
+        largest = max(names, key=lambda name: len(instances[name]["Cast_plan"]))
+        for factor in scales:
+            instance = scale_instance(instances[largest], factor)
+            results["instances"][f"{largest}_x{factor}"] = benchmark_instance(instance, decodes, seed)
+
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    return results
+
+
+def compare_results(baseline: Dict, results: Dict, tolerance: float = 0.1):
+    """
+        Function to compare the results of two benchmark runs
+    Args:
+        baseline: dictionary of results of the reference run
+        results: dictionary of results of the new run
+        tolerance: float, relative slowdown of the throughput (or increase of the other measures) above which a
+            measure is reported as a regression
+
+    Returns:
+        regressions: dictionary of (baseline value, new value) of the measures that regressed, indexed by instance
+            name and measure
+    """
+    regressions = {}
+    for name, measures in results["instances"].items():
+        for measure, value in measures.items():
+            reference = baseline["instances"].get(name, {}).get(measure)
+            if reference is None or not measure.endswith(("time", "per_second", "memory")) and \
+                    not measure.startswith("latency"):
+                continue
+
+            if measure == "decodes_per_second":
+                regressed = value < reference * (1 - tolerance)
+
+            else:
+                regressed = value > reference * (1 + tolerance)
+
+            if regressed:
+                regressions.setdefault(name, {})[measure] = (reference, value)
+
+    return regressions
+
+
+def main(arguments: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the loading and decoding of the instances")
+    parser.add_argument("paths", nargs="*", help=f"instance folders or directories of them (default {DATA_DIRECTORY})")
+    parser.add_argument("--names", nargs="+", help="names of the instances to benchmark (default all)")
+    parser.add_argument("--decodes", type=int, default=20, help="number of timed decodes per instance")
+    parser.add_argument("--scales", type=int, nargs="*", default=[2, 4], help="factors of the synthetic instances")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the permutations and of the decoder")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file to save the results to")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change reported as a regression")
+    args = parser.parse_args(arguments)
+
+    results = run_benchmarks(args.paths, args.names, args.decodes, args.scales, args.seed, args.output)
+
+    for name, measures in results["instances"].items():
+        print(f"{name}: {measures['num_charges']} charges, {measures['decodes_per_second']:.1f} decodes/s, "
+              f"p50 {measures['latency_p50'] * 1000:.2f} ms, p99 {measures['latency_p99'] * 1000:.2f} ms, "
+              f"peak {measures['peak_memory'] / 2 ** 20:.1f} MiB")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_results(json.load(file), results, args.tolerance)
+
+        for name, measures in regressions.items():
+            for measure, (reference, value) in measures.items():
+                print(f"Regression in {name} {measure}: {reference:.6g} -> {value:.6g}")
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
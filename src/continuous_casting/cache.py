@@ -0,0 +1,190 @@
+import hashlib
+import shelve
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.continuous_casting.utils import to_table
+
+# Estimate in bytes of the memory used by an entry besides its schedule: key, objectives and bookkeeping
+ENTRY_OVERHEAD = 512
+
+
+def instance_fingerprint(instance: Dict):
+    """
+        Function to get a fingerprint of the tables of an instance, the same for the same data in any process
+    Args:
+        instance: dictionary of instance, of structured arrays or DataFrames
+
+    Returns:
+        fingerprint: string, hexadecimal digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(instance):
+        table = to_table(instance[name])
+        digest.update(name.encode())
+        for column in table.dtype.names:
+            digest.update(column.encode())
+            digest.update(str(table[column].dtype).encode())
+            digest.update(np.ascontiguousarray(table[column]).tobytes())
+
+    return digest.hexdigest()
+
+
+class FitnessCache:
+    def __init__(self, instance: Dict, settings: Sequence = (), max_memory: int = 64 * 2 ** 20,
+                 store_schedules: bool = False, path: str = None):
+        """
+            Cache of the objective values of decoded permutations of the charges processed in stage 1, and
+            optionally of their schedules, evicting the least recently used entries once over a memory bound.
+
+            Entries are keyed by a hash of the instance, of the settings of the decoder and of the permutation, so
+            one cache file can be shared by several instances and settings. With a path, entries are also kept in
+            an on-disk shelf, which is looked up on a miss and survives the process.
+        Args:
+            instance: dictionary of instance
+            settings: settings of the decoder that change the objective values, e.g. the lambdas (see
+                settings_of)
+            max_memory: int, estimate in bytes of the memory used by the entries kept in memory
+            store_schedules: bool, whether to keep the machine, starting time and ending time of each operation
+            path: string, path of the on-disk shelf (optional)
+        """
+        self.max_memory = max_memory
+        self.store_schedules = store_schedules
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory = 0
+
+        self.__prefix = f"{instance_fingerprint(instance)}:{tuple(settings)!r}:".encode()
+        self.__entries = OrderedDict()
+        self.__shelf = shelve.open(path) if path is not None else None
+
+    @staticmethod
+    def settings_of(simulation):
+        """
+            Get the settings of a simulation that change the objective values of a permutation. An unseeded
+            simulation draws its own random tie-breaks, so they are identified by a digest of their priorities
+            instead of the seed: its entries are never returned to another unseeded simulation.
+        Returns:
+            settings: tuple of lambdas, flexible casting, seed (or digest of the tie-break priorities) and tie-break
+                policy
+        """
+        seed = simulation.seed
+        if seed is None and simulation.tie_break_priority is not None:
+            seed = hashlib.blake2b(simulation.tie_break_priority.tobytes(), digest_size=16).hexdigest()
+
+        return simulation.lambdas, simulation.flexible_casting, seed, simulation.tie_break
+
+    def key(self, zeta: List[int]):
+        """
+            Get the key of a permutation
+        Returns:
+            key: string, hexadecimal digest
+        """
+        return hashlib.blake2b(self.__prefix + np.asarray(zeta, dtype=np.int64).tobytes(), digest_size=20).hexdigest()
+
+    def get(self, zeta: List[int]):
+        """
+            Get the entry of a permutation, counting a hit or a miss
+        Args:
+            zeta: list of int, permutation of the charges processed in stage 1
+
+        Returns:
+            (objectives, schedule) or None if the permutation is not cached. The schedule is None unless
+            schedules are stored, otherwise it is a tuple of arrays (machine, starting_time, ending_time)
+        """
+        key = self.key(zeta)
+
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+            self.hits += 1
+
+            return entry
+
+        if self.__shelf is not None and key in self.__shelf:
+            entry = self.__shelf[key]
+            self.__keep(key, entry)
+            self.disk_hits += 1
+
+            return entry
+
+        self.misses += 1
+
+        return None
+
+    def put(self, zeta: List[int], objectives: Sequence[float], schedule=None):
+        """
+            Cache the objective values of a permutation, and its schedule if schedules are stored
+        Args:
+            zeta: list of int, permutation of the charges processed in stage 1
+            objectives: objective values (z1, z2, z3) of the permutation
+            schedule: Schedule decoded from the permutation (optional)
+        """
+        compact_schedule = None
+        if self.store_schedules and schedule is not None:
+            compact_schedule = (schedule.machine.astype(np.int32), schedule.starting_time.copy(),
+                                schedule.ending_time.copy())
+
+        key = self.key(zeta)
+        entry = (tuple(float(value) for value in objectives), compact_schedule)
+
+        self.__keep(key, entry)
+        if self.__shelf is not None:
+            self.__shelf[key] = entry
+
+    def __keep(self, key: str, entry: Tuple):
+        """
+            Keep an entry in memory as the most recently used one, evicting the least recently used ones if needed
+        """
+        if key in self.__entries:
+            self.memory -= self.__size(self.__entries.pop(key))
+
+        self.__entries[key] = entry
+        self.memory += self.__size(entry)
+
+        while self.memory > self.max_memory and len(self.__entries) > 1:
+            _, evicted = self.__entries.popitem(last=False)
+            self.memory -= self.__size(evicted)
+            self.evictions += 1
+
+    @staticmethod
+    def __size(entry: Tuple):
+        _, schedule = entry
+        return ENTRY_OVERHEAD + (sum(array.nbytes for array in schedule) if schedule is not None else 0)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def statistics(self):
+        """
+            Get the statistics of the cache
+        Returns:
+            statistics: dictionary of hits (in memory and on disk), misses, hit rate, evictions, entries in memory
+                and their memory estimate in bytes
+        """
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "hit_rate": self.hit_rate,
+                "evictions": self.evictions, "entries": len(self.__entries), "memory": self.memory}
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def close(self):
+        """
+            Close the on-disk shelf, if any
+        """
+        if self.__shelf is not None:
+            self.__shelf.close()
+            self.__shelf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,5 +1,9 @@
 from typing import Dict
-import pendulum
+
+import numpy as np
+
+# Index of each type of processing time in the first axis of Charges.processing_times
+PROCESSING_TIME_TYPES = {"MinTime": 0, "StandardTime": 1, "MaxTime": 2}
 
 
 class Charges:
@@ -10,19 +14,17 @@ class Charges:
             instance: dictionary of instance
         """
 
-        self.__num_charges = len(instance["Cast_plan"])
+        # Charges are indexed from 1 to max_charge_index, there may be gaps (e.g. charges removed when rescheduling)
+        self.__max_charge_index = int(max(instance["Cast_plan"]["ChargeID"]))
 
         self.cast_plan = {}
         self.__init_cast_plan(instance)
 
-        self.last_stage = self.cast_plan[1]["ChargeRoute"][-1]
-
-        self.current_earliest_available_time = {key: pendulum.datetime(1980, 1, 1, 0, 0) for key in
-                                                list(range(1, self.__num_charges + 1))}
-
-        self.previous_machine = {key: None for key in list(range(1, self.__num_charges + 1))}
+        self.last_stage = next(iter(self.cast_plan.values()))["ChargeRoute"][-1]
 
-        self.earliest_starting_time = {key: [] for key in list(range(1, self.__num_charges + 1))}
+        self.__charges_in_stage = {}
+        self.route_position = None
+        self.__init_route_index()
 
         self.__non_cc_processing_time = None
         self.__init_non_cc_processing_time(instance)
@@ -30,8 +32,23 @@ class Charges:
         self.cc_processing_time = None
         self.__init_cc_processing_time(instance)
 
-        self.allocation = {key: {"Allocation": [], "StartingTime": [], "EndingTime": []} for key in
-                           list(range(1, self.__num_charges + 1))}
+        self.processing_times = None
+        self.__init_processing_times()
+
+        self.reset()
+
+    def reset(self):
+        """
+            Restore the scheduling state (current earliest available times and previous machines) of every charge,
+            keeping the instance data already parsed
+        """
+        # Arrays indexed by charge index (position 0 is unused). Times are in minutes since the epoch of the
+        # instance, charges are available from the beginning and -1 stands for no previous machine
+        self.current_earliest_available_time = np.full(self.__max_charge_index + 1, -np.inf)
+
+        self.previous_machine = np.full(self.__max_charge_index + 1, -1)
+
+        self.earliest_starting_time = {key: [] for key in self.cast_plan}
 
     def __init_cast_plan(self, instance: Dict):
         """
@@ -46,9 +63,32 @@ class Charges:
             instance: dictionary of instance
 
         """
-        for index, row in instance["Cast_plan"].iterrows():
-            self.cast_plan[row["ChargeID"]] = {"CC": row["CC"],
-                                               "ChargeRoute": [int(item) for item in row["ChargeRoute"].split("-")]}
+        cast_plan = instance["Cast_plan"]
+        for charge, cast, cc, charge_route in zip(cast_plan["ChargeID"], cast_plan["CastID"], cast_plan["CC"],
+                                                  cast_plan["ChargeRoute"]):
+            self.cast_plan[int(charge)] = {"CC": int(cc),
+                                           "CastID": int(cast),
+                                           "ChargeRoute": [int(item) for item in charge_route.split("-")]}
+
+    def __init_route_index(self):
+        """
+            Function to initiate the indexes of the charge routes
+
+            charges_in_stage: dictionary of charges processed in each stage, indexed by stage
+            route_position: array of the position of each stage in the route of each charge,
+                indexed by charge index and stage (-1 if the charge is not processed in the stage)
+        """
+        self.route_position = np.full((self.__max_charge_index + 1, self.last_stage + 1), -1)
+
+        charges_in_stage = {stage: [] for stage in range(self.last_stage + 1)}
+        for charge, cast_plan in self.cast_plan.items():
+            for position, stage in enumerate(cast_plan["ChargeRoute"]):
+                self.route_position[charge, stage] = position
+                charges_in_stage[stage].append(charge)
+
+        for stage, charges in charges_in_stage.items():
+            self.__charges_in_stage[stage] = np.array(charges, dtype=int)
+            self.__charges_in_stage[stage].setflags(write=False)
 
     def __init_non_cc_processing_time(self, instance: Dict):
         """
@@ -64,13 +104,17 @@ class Charges:
 
 
         """
-        self.__non_cc_processing_time = {key: {} for key in list(range(1, self.__num_charges + 1))}
-
-        for index, row in instance["nonCC_Processing_Time"].iterrows():
-            if row["ChargeID"] in self.__non_cc_processing_time.keys():
-                self.__non_cc_processing_time[row["ChargeID"]][row["StageID"]] = {"MinTime": row["MinTime"],
-                                                                                  "StandardTime": row["Standard_Time"],
-                                                                                  "MaxTime": row["MaxTime"]}
+        self.__non_cc_processing_time = {key: {} for key in self.cast_plan}
+
+        processing_time = instance["nonCC_Processing_Time"]
+        for stage, charge, min_time, standard_time, max_time in zip(
+                processing_time["StageID"].tolist(), processing_time["ChargeID"].tolist(),
+                processing_time["MinTime"].tolist(), processing_time["Standard_Time"].tolist(),
+                processing_time["MaxTime"].tolist()):
+            if charge in self.__non_cc_processing_time.keys():
+                self.__non_cc_processing_time[charge][stage] = {"MinTime": min_time,
+                                                                "StandardTime": standard_time,
+                                                                "MaxTime": max_time}
 
     def __init_cc_processing_time(self, instance: Dict):
         """
@@ -87,48 +131,63 @@ class Charges:
         Returns:
 
         """
-        self.cc_processing_time = {key: {} for key in list(range(1, self.__num_charges + 1))}
+        self.cc_processing_time = {key: {} for key in self.cast_plan}
         self.cc_processing_time["Charge_Sequences"] = {}
 
-        for index, row in instance["CC_Processing_Time"].iterrows():
-            if row["ChargeID"] in self.cc_processing_time:
-                if row["CCID"] not in self.cc_processing_time["Charge_Sequences"]:
-                    self.cc_processing_time["Charge_Sequences"][row["CCID"]] = []
+        processing_time = instance["CC_Processing_Time"]
+        for cc, charge, min_time, standard_time, max_time in zip(
+                processing_time["CCID"].tolist(), processing_time["ChargeID"].tolist(),
+                processing_time["MinTime"].tolist(), processing_time["Standard_Time"].tolist(),
+                processing_time["MaxTime"].tolist()):
+            if charge in self.cc_processing_time:
+                if cc not in self.cc_processing_time["Charge_Sequences"]:
+                    self.cc_processing_time["Charge_Sequences"][cc] = []
+
+                self.cc_processing_time["Charge_Sequences"][cc].append(charge)
+
+                self.cc_processing_time[charge] = {"MinTime": min_time,
+                                                   "StandardTime": standard_time,
+                                                   "MaxTime": max_time}
+
+    def __init_processing_times(self):
+        """
+            Function to initiate the dense table of processing times, with the continuous casting stage folded in
+
+            processing_times: read-only array of processing times, indexed by type of processing time (see
+                PROCESSING_TIME_TYPES), charge index and stage (nan if the charge is not processed in the stage)
+        """
+        self.processing_times = np.full((len(PROCESSING_TIME_TYPES), self.__max_charge_index + 1,
+                                         self.last_stage + 1), np.nan)
 
-                self.cc_processing_time["Charge_Sequences"][row["CCID"]].append(row["ChargeID"])
+        for pt_type, pt_index in PROCESSING_TIME_TYPES.items():
+            for charge, stages in self.__non_cc_processing_time.items():
+                for stage, processing_time in stages.items():
+                    self.processing_times[pt_index, charge, stage] = processing_time[pt_type]
 
-                self.cc_processing_time[row["ChargeID"]] = {"MinTime": row["MinTime"],
-                                                            "StandardTime": row["Standard_Time"],
-                                                            "MaxTime": row["MaxTime"]}
+            for charge in self.in_stage(self.last_stage):
+                self.processing_times[pt_index, charge, self.last_stage] = self.cc_processing_time[charge][pt_type]
+
+        self.processing_times.setflags(write=False)
 
     def in_stage(self, h: int):
         """
-            Get list of charges processed in stage h
+            Get charges processed in stage h
         Args:
             h: stage
 
         Returns:
-            charges_in_stage: list of int, contains indexes of charges processed in stage h
+            charges_in_stage: read-only array of int, contains indexes of charges processed in stage h
 
         """
 
-        charges_in_stage = []
-        for charge, cast_plan in self.cast_plan.items():
-            if h in cast_plan["ChargeRoute"]:
-                charges_in_stage.append(charge)
-
-        return charges_in_stage
+        return self.__charges_in_stage[h]
 
     def allocate(self, charge_index, machine_index, starting_time, ending_time):
-        self.allocation[charge_index]["Allocation"].append(machine_index)
-        self.allocation[charge_index]["StartingTime"].append(starting_time)
-        self.allocation[charge_index]["EndingTime"].append(ending_time)
-
+        """
+            Update the state of a charge allocated to a machine, the allocation itself is kept in the Schedule
+        """
         self.current_earliest_available_time[charge_index] = ending_time
+        self.previous_machine[charge_index] = machine_index
 
     def process_time(self, charge_index, stage, pt_type: str = "StandardTime"):
-        if stage == self.last_stage:
-            return self.cc_processing_time[charge_index][pt_type]
-
-        else:
-            return int(self.__non_cc_processing_time[charge_index][stage][pt_type])
+        return self.processing_times[PROCESSING_TIME_TYPES[pt_type], charge_index, stage]
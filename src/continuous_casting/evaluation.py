@@ -0,0 +1,114 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.continuous_casting.simulation import Simulation
+
+# Decoder of the current worker process, set once by the pool initializer
+_simulation = None
+
+
+def _init_worker(simulation: Simulation):
+    """
+        Keep the preprocessed simulation shipped to a worker process, so it is unpickled once per worker
+    Args:
+        simulation: Simulation built with run=False
+    """
+    global _simulation
+    _simulation = simulation
+
+
+def _decode(zeta: List[int]):
+    """
+        Decode a permutation with the simulation of the current worker process
+    Args:
+        zeta: list of int, permutation of the charges processed in stage 1
+
+    Returns:
+        (z1, z2, z3): tuple of objective values
+
+    """
+    return _simulation.decode(zeta)
+
+
+class Evaluator:
+    def __init__(self, instance: Dict, workers: int = None, lambdas: Tuple[float, float, float] = (1, 1, 1),
+                 seed: int = None):
+        """
+            Evaluate permutations of the charges processed in stage 1 of an instance, parsed once.
+
+            With more than one worker, the simulation is sent to each worker process by the pool initializer
+            and the pool is kept until the evaluator is closed. Results are returned in the order of the
+            permutations, so they do not depend on the number of workers.
+        Args:
+            instance: dictionary of instance
+            workers: int, number of worker processes (number of CPUs if None); 1 evaluates in the current process
+            lambdas: tuple of float, weights (lambda1, lambda2, lambda3) of the objectives z1, z2 and z3
+            seed: int, seed of the tie-breaks of the simulation (optional), the same in every worker process
+        """
+        self.simulation = Simulation(instance, name="evaluation", run=False, headless=True, lambdas=lambdas,
+                                     seed=seed)
+        self.workers = workers or os.cpu_count()
+
+        self.__executor = None
+        if self.workers > 1:
+            self.__executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                  initargs=(self.simulation,))
+
+    def evaluate(self, permutations: List[List[int]], chunksize: int = None):
+        """
+            Evaluate permutations of the charges processed in stage 1
+        Args:
+            permutations: list of permutations of the charges processed in stage 1
+            chunksize: int, number of permutations sent to a worker at once (optional)
+
+        Returns:
+            objectives: array of shape (len(permutations), 3), with the (z1, z2, z3) of each permutation
+
+        """
+        if self.__executor is None or len(permutations) <= 1:
+            objectives = [self.simulation.decode(zeta) for zeta in permutations]
+
+        else:
+            if chunksize is None:
+                chunksize = max(1, len(permutations) // (self.workers * 4))
+
+            objectives = list(self.__executor.map(_decode, permutations, chunksize=chunksize))
+
+        return np.array(objectives, dtype=float).reshape(len(permutations), 3)
+
+    def close(self):
+        """
+            Shut down the worker processes, if any
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def evaluate_population(instance: Dict, permutations: List[List[int]], workers: int = None, chunksize: int = None,
+                        lambdas: Tuple[float, float, float] = (1, 1, 1), seed: int = None):
+    """
+        Evaluate many permutations of the charges processed in stage 1 on the same instance
+    Args:
+        instance: dictionary of instance
+        permutations: list of permutations of the charges processed in stage 1
+        workers: int, number of worker processes (number of CPUs if None); 1 evaluates in the current process
+        chunksize: int, number of permutations sent to a worker at once (optional)
+        lambdas: tuple of float, weights (lambda1, lambda2, lambda3) of the objectives z1, z2 and z3
+        seed: int, seed of the tie-breaks of the simulation (optional)
+
+    Returns:
+        objectives: array of shape (len(permutations), 3), with the (z1, z2, z3) of each permutation
+
+    """
+    with Evaluator(instance, workers, lambdas, seed) as evaluator:
+        return evaluator.evaluate(permutations, chunksize)
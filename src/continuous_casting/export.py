@@ -0,0 +1,160 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+from src.continuous_casting.charges import PROCESSING_TIME_TYPES
+
+# Columns of the exported operations
+COLUMNS = ("charge", "stage", "machine", "start", "end", "waiting", "deviation")
+
+# Export formats, indexed by file extension
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def schedule_chunks(simulation, chunk_size: int = 10000):
+    """
+        Function to iterate over the allocated operations of the schedule of a simulation, in chunks of columns
+        computed at once. Operations come charge by charge, in route order.
+
+            charge: charge index
+            stage: stage of the operation
+            machine: machine allocated to the operation
+            start: starting time, as numpy datetime64 in UTC
+            end: ending time, as numpy datetime64 in UTC
+            waiting: time waited by the charge before the operation, after its previous operation and the
+                transport, in minutes (0 for the first operation of a charge)
+            deviation: processing time minus standard processing time, in minutes
+    Args:
+        simulation: Simulation with a decoded schedule
+        chunk_size: int, maximum number of operations of a chunk
+
+    Returns:
+        generator of dictionaries of arrays, indexed by column
+    """
+    schedule = simulation.schedule
+    epoch = simulation.machines.epoch.timestamp()
+
+    allocated = np.flatnonzero(schedule.machine >= 0)
+    for chunk_start in range(0, len(allocated), chunk_size):
+        operations = allocated[chunk_start:chunk_start + chunk_size]
+
+        charges = schedule.operation_charge[operations]
+        stages = schedule.operation_stage[operations]
+        machines = schedule.machine[operations]
+        starting_times = schedule.starting_time[operations]
+        ending_times = schedule.ending_time[operations]
+
+        # The previous operation of a charge is the previous operation index, if the charge is the same
+        has_previous = (operations > 0) & schedule.has_next_operation[operations - 1]
+        previous = operations[has_previous] - 1
+        waiting = np.zeros(len(operations))
+        waiting[has_previous] = starting_times[has_previous] - schedule.ending_time[previous] - \
+            simulation.machines.transport_times[schedule.machine[previous], machines[has_previous]]
+
+        standard_times = simulation.charges.processing_times[PROCESSING_TIME_TYPES["StandardTime"], charges, stages]
+
+        yield {"charge": charges,
+               "stage": stages,
+               "machine": machines,
+               "start": _to_datetime64(epoch, starting_times),
+               "end": _to_datetime64(epoch, ending_times),
+               "waiting": waiting,
+               "deviation": ending_times - starting_times - standard_times}
+
+
+def _to_datetime64(epoch: float, minutes: np.ndarray):
+    """
+        Convert times in minutes since the epoch of an instance into datetime64 in UTC, to the second
+    """
+    return (epoch + minutes * 60).round().astype("datetime64[s]")
+
+
+def _rows(chunk):
+    """
+        Convert a chunk into rows of Python values, with the times as ISO 8601 strings in UTC
+    """
+    columns = [chunk[column].tolist() if column not in ("start", "end") else
+               np.datetime_as_string(chunk[column], timezone="UTC").tolist() for column in COLUMNS]
+
+    return zip(*columns)
+
+
+def write_csv(simulation, file, chunk_size: int = 10000):
+    """
+        Function to write the operations of the schedule of a simulation as csv, one chunk at a time
+    Args:
+        simulation: Simulation with a decoded schedule
+        file: text file opened with newline=""
+        chunk_size: int, maximum number of operations written at once
+    """
+    writer = csv.writer(file)
+    writer.writerow(COLUMNS)
+
+    for chunk in schedule_chunks(simulation, chunk_size):
+        writer.writerows(_rows(chunk))
+
+
+def write_json_lines(simulation, file, chunk_size: int = 10000):
+    """
+        Function to write the operations of the schedule of a simulation as JSON lines, one object per operation
+    Args:
+        simulation: Simulation with a decoded schedule
+        file: text file
+        chunk_size: int, maximum number of operations written at once
+    """
+    for chunk in schedule_chunks(simulation, chunk_size):
+        file.writelines(json.dumps(dict(zip(COLUMNS, row))) + "\n" for row in _rows(chunk))
+
+
+def write_parquet(simulation, path: str, chunk_size: int = 10000):
+    """
+        Function to write the operations of the schedule of a simulation as Parquet, one row group per chunk.
+        Requires pyarrow.
+    Args:
+        simulation: Simulation with a decoded schedule
+        path: path of the file
+        chunk_size: int, maximum number of operations of a row group
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("charge", pa.int64()), ("stage", pa.int64()), ("machine", pa.int64()),
+                        ("start", pa.timestamp("s", tz="UTC")), ("end", pa.timestamp("s", tz="UTC")),
+                        ("waiting", pa.float64()), ("deviation", pa.float64())])
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in schedule_chunks(simulation, chunk_size):
+            writer.write_table(pa.table({column: chunk[column] for column in COLUMNS}, schema=schema))
+
+
+def export_schedule(simulation, path: str, file_format: str = None, chunk_size: int = 10000):
+    """
+        Function to export the operations of the schedule of a simulation, streaming them in chunks
+    Args:
+        simulation: Simulation with a decoded schedule
+        path: path of the file
+        file_format: string, "csv", "parquet" or "jsonl" (from the extension of the path if None)
+        chunk_size: int, maximum number of operations written at once
+    """
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in FORMATS:
+            raise ValueError(f"unknown format of {path}, expected one of {sorted(FORMATS)}")
+
+        file_format = FORMATS[extension]
+
+    if file_format == "parquet":
+        write_parquet(simulation, path, chunk_size)
+
+    elif file_format == "csv":
+        with open(path, "w", newline="") as file:
+            write_csv(simulation, file, chunk_size)
+
+    elif file_format == "jsonl":
+        with open(path, "w") as file:
+            write_json_lines(simulation, file, chunk_size)
+
+    else:
+        raise ValueError("file_format must be 'csv', 'parquet' or 'jsonl'")
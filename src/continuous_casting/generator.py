@@ -0,0 +1,178 @@
+import argparse
+import csv
+import os
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+import numpy as np
+
+# Format of the earliest available times of the machines
+EAT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Columns of each table, with their type
+TABLES = {"Cast_plan": {"ChargeID": "INTEGER", "CastID": "INTEGER", "CC": "INTEGER", "ChargeRoute": "STRING"},
+          "Machine": {"MachineID": "INTEGER", "StageID": "INTEGER"},
+          "Stage": {"StageID": "INTEGER", "MachineID": "INTEGER"},
+          "Transport_Time": {"Transport_line": "STRING", "Transport_Time": "INTEGER"},
+          "Earliest_available_time": {"MachineID": "INTEGER", "EAT": "STRING"},
+          "CC_Processing_Time": {"CCID": "INTEGER", "ChargeID": "INTEGER", "MinTime": "INTEGER",
+                                 "Standard_Time": "INTEGER", "MaxTime": "INTEGER"},
+          "nonCC_Processing_Time": {"StageID": "INTEGER", "ChargeID": "INTEGER", "MinTime": "INTEGER",
+                                    "Standard_Time": "INTEGER", "MaxTime": "INTEGER"}}
+
+
+class TableWriter:
+    def __init__(self, instance_path: str, table: str):
+        """
+            Write the rows of a table to its csv file as they come, and its .columns file once closed, with the
+            length of each column measured on the rows written
+        Args:
+            instance_path: path to the instance folder
+            table: string, name of the table (see TABLES)
+        """
+        self.__columns = TABLES[table]
+        self.__lengths = [0] * len(self.__columns)
+        self.__columns_path = os.path.join(instance_path, f"{table}.columns")
+
+        self.__file = open(os.path.join(instance_path, f"{table}.csv"), "w", newline="")
+        self.__writer = csv.writer(self.__file, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        self.__writer.writerow(self.__columns)
+
+    def write(self, *row):
+        row = [str(value) for value in row]
+        self.__lengths = [max(length, len(value)) for length, value in zip(self.__lengths, row)]
+        self.__writer.writerow(row)
+
+    def close(self):
+        self.__file.close()
+
+        with open(self.__columns_path, "w", newline="") as file:
+            writer = csv.writer(file, quoting=csv.QUOTE_ALL, lineterminator="\n")
+            writer.writerow(["name", "type", "length", "leftDigits", "rightDigits"])
+            for (name, column_type), length in zip(self.__columns.items(), self.__lengths):
+                digits = length if column_type == "INTEGER" else 0
+                writer.writerow([name, column_type, length, digits, 0])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def generate_instance(instance_path: str, num_charges: int, num_casts: int, num_stages: int = 4,
+                      machines_per_stage: Union[int, Sequence[int]] = 3, num_casters: int = 2,
+                      skip_probability: float = 0.2, start: datetime = datetime(2016, 2, 16, 8, 0),
+                      seed: int = None):
+    """
+        Function to generate a synthetic instance folder, with the same tables as the instances in
+        continuous_casting/data. The rows of the charges are written as they are drawn, so the memory used does not
+        depend on the number of charges.
+
+        The last stage holds the casters. Each charge is processed in a random subset of the other stages (each
+        stage is skipped with skip_probability, but never all of them) and then cast. The charges are split into
+        casts of consecutive charges, and the casts are assigned to the casters in turn. Every machine is linked
+        to every machine of the later stages.
+    Args:
+        instance_path: path to the instance folder, created if needed
+        num_charges: int, number of charges
+        num_casts: int, number of casts
+        num_stages: int, number of stages, including the casting stage
+        machines_per_stage: int, or list of int, number of machines of each stage before the casting stage
+        num_casters: int, number of casters
+        skip_probability: float, probability of a charge skipping a stage before the casting stage
+        start: datetime, earliest available time of the machines, each one delayed by up to an hour
+        seed: int, seed of the random number generator (optional)
+
+    Returns:
+        instance_path: path to the instance folder
+    """
+    if not 1 <= num_casts <= num_charges:
+        raise ValueError("num_casts must be between 1 and num_charges")
+
+    if isinstance(machines_per_stage, int):
+        machines_per_stage = [machines_per_stage] * (num_stages - 1)
+
+    if len(machines_per_stage) != num_stages - 1:
+        raise ValueError("machines_per_stage must give the number of machines of each stage before the casting stage")
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(instance_path, exist_ok=True)
+
+    machines_in_stage = []
+    for num_machines in list(machines_per_stage) + [num_casters]:
+        first_machine = sum(len(machines) for machines in machines_in_stage)
+        machines_in_stage.append(range(first_machine, first_machine + num_machines))
+
+    casters = machines_in_stage[-1]
+    last_stage = num_stages - 1
+
+    with TableWriter(instance_path, "Machine") as machine_table, \
+            TableWriter(instance_path, "Stage") as stage_table, \
+            TableWriter(instance_path, "Earliest_available_time") as eat_table:
+        for stage, machines in enumerate(machines_in_stage):
+            for machine in machines:
+                machine_table.write(machine, stage)
+                stage_table.write(stage, machine)
+                eat = start + timedelta(minutes=int(rng.integers(0, 60)))
+                eat_table.write(machine, eat.strftime(EAT_FORMAT))
+
+    with TableWriter(instance_path, "Transport_Time") as transport_table:
+        for stage, machines in enumerate(machines_in_stage):
+            for machine in machines:
+                for next_machines in machines_in_stage[stage + 1:]:
+                    for next_machine in next_machines:
+                        transport_table.write(f"{machine}-{next_machine}", int(rng.integers(5, 21)))
+
+    with TableWriter(instance_path, "Cast_plan") as cast_plan_table, \
+            TableWriter(instance_path, "CC_Processing_Time") as cc_table, \
+            TableWriter(instance_path, "nonCC_Processing_Time") as non_cc_table:
+        for charge in range(1, num_charges + 1):
+            cast = (charge - 1) * num_casts // num_charges + 1
+            caster = casters[(cast - 1) % num_casters]
+
+            stages = [stage for stage in range(last_stage) if rng.random() >= skip_probability]
+            if not stages and last_stage:
+                stages = [int(rng.integers(0, last_stage))]
+
+            route = stages + [last_stage]
+            cast_plan_table.write(charge, cast, caster, "-".join(str(stage) for stage in route))
+
+            for stage in stages:
+                non_cc_table.write(stage, charge, *_processing_times(rng, 20, 45, 10))
+
+            cc_table.write(caster, charge, *_processing_times(rng, 45, 60, 10))
+
+    return instance_path
+
+
+def _processing_times(rng: np.random.Generator, low: int, high: int, spread: int):
+    """
+        Draw the minimum, standard and maximum processing times of an operation
+    """
+    standard_time = int(rng.integers(low, high + 1))
+    return (standard_time - int(rng.integers(1, spread + 1)), standard_time,
+            standard_time + int(rng.integers(1, spread + 1)))
+
+
+def main(arguments: Sequence[str] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic instance folder")
+    parser.add_argument("instance_path", help="instance folder to write")
+    parser.add_argument("--charges", type=int, required=True, help="number of charges")
+    parser.add_argument("--casts", type=int, required=True, help="number of casts")
+    parser.add_argument("--stages", type=int, default=4, help="number of stages, including the casting stage")
+    parser.add_argument("--machines", type=int, nargs="+", default=[3],
+                        help="number of machines of each stage before the casting stage (or of all of them)")
+    parser.add_argument("--casters", type=int, default=2, help="number of casters")
+    parser.add_argument("--skip-probability", type=float, default=0.2,
+                        help="probability of a charge skipping a stage before the casting stage")
+    parser.add_argument("--seed", type=int, help="seed of the random number generator")
+    args = parser.parse_args(arguments)
+
+    machines_per_stage = args.machines[0] if len(args.machines) == 1 else args.machines
+    generate_instance(args.instance_path, args.charges, args.casts, args.stages, machines_per_stage, args.casters,
+                      args.skip_probability, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.continuous_casting.cache import FitnessCache
+from src.continuous_casting.evaluation import Evaluator
+from src.continuous_casting.pareto import ParetoArchive
+
+
+class GeneticAlgorithm:
+    def __init__(self, instance: Dict, population_size: int = 50, crossover_rate: float = 0.9,
+                 mutation_rate: float = 0.2, elitism: int = 2, tournament_size: int = 3, max_generations: int = 100,
+                 time_limit: float = None, patience: int = None, workers: int = 1, seed: int = None,
+                 lambdas: Tuple[float, float, float] = (1, 1, 1), cache_memory: int = 64 * 2 ** 20,
+                 cache_path: str = None):
+        """
+            Genetic algorithm over the permutation of the charges processed in stage 1 (the chromosome),
+            decoded by the simulation heuristic. The fitness of a chromosome is the sum of its weighted
+            objective values z1 + z2 + z3, to be minimized. Every chromosome decoded is also offered to a Pareto
+            archive of (z1, z2, z3), to pick other trade-offs after the run. The objective values of the chromosomes
+            decoded are kept in a FitnessCache, so chromosomes seen again, in this run or a previous one sharing
+            the cache path, are not decoded again.
+        Args:
+            instance: dictionary of instance
+            population_size: int, number of chromosomes in each generation
+            crossover_rate: float, probability of applying the order crossover to a pair of parents
+            mutation_rate: float, probability of mutating an offspring (swap or insertion)
+            elitism: int, number of best chromosomes copied unchanged to the next generation
+            tournament_size: int, number of chromosomes competing in each tournament selection
+            max_generations: int, maximum number of generations
+            time_limit: float, wall-clock budget in seconds (optional)
+            patience: int, number of generations without improvement before stopping early (optional)
+            workers: int, number of worker processes used to decode the chromosomes
+            seed: int, seed of the random number generator and of the tie-breaks of the decoder (optional)
+            lambdas: tuple of float, weights (lambda1, lambda2, lambda3) of the objectives z1, z2 and z3
+            cache_memory: int, estimate in bytes of the memory used by the fitness cache
+            cache_path: string, path of the on-disk shelf of the fitness cache (optional). Not used without a seed,
+                as the random tie-breaks of the decoder would differ in the next runs
+        """
+        self.instance = instance
+        self.population_size = population_size
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.elitism = elitism
+        self.tournament_size = tournament_size
+        self.max_generations = max_generations
+        self.time_limit = time_limit
+        self.patience = patience
+        self.workers = workers
+        self.lambdas = tuple(lambdas)
+        self.seed = seed
+        self.cache_memory = cache_memory
+        self.cache_path = cache_path
+
+        self.__rng = np.random.default_rng(seed)
+
+        self.fitness_cache = None
+        self.__objectives = []
+        self.archive = ParetoArchive()
+
+        self.best_zeta = None
+        self.best_objectives = None
+        self.best_fitness = float("inf")
+        self.history = []
+
+    def run(self):
+        """
+            Evolve the population until the number of generations, the time limit or the patience is reached
+        Returns:
+            best_zeta: list of int, best permutation of the charges processed in stage 1
+            best_objectives: tuple of objective values (z1, z2, z3) of the best permutation
+
+        """
+        start = time.perf_counter()
+
+        with Evaluator(self.instance, self.workers, self.lambdas, self.seed) as evaluator, \
+                FitnessCache(self.instance, FitnessCache.settings_of(evaluator.simulation), self.cache_memory,
+                             path=self.cache_path if self.seed is not None else None) as self.fitness_cache:
+            charges = evaluator.simulation.charges.in_stage(0)
+
+            population = [self.__rng.permutation(charges).tolist() for _ in range(self.population_size)]
+            fitness = self.__evaluate(evaluator, population)
+
+            generations_without_improvement = 0
+            for generation in range(self.max_generations):
+                if self.__update_best(population, fitness):
+                    generations_without_improvement = 0
+
+                else:
+                    generations_without_improvement += 1
+
+                self.history.append(self.best_fitness)
+
+                if self.patience is not None and generations_without_improvement >= self.patience:
+                    break
+
+                if self.time_limit is not None and time.perf_counter() - start >= self.time_limit:
+                    break
+
+                population = self.__next_generation(population, fitness)
+                fitness = self.__evaluate(evaluator, population)
+
+            else:
+                self.__update_best(population, fitness)
+
+        return self.best_zeta, self.best_objectives
+
+    def __evaluate(self, evaluator: Evaluator, population: List[List[int]]):
+        """
+            Get the fitness of each chromosome, decoding only the ones not found in the fitness cache, and keep the
+            objective values of each chromosome
+        Args:
+            evaluator: Evaluator of the instance
+            population: list of chromosomes
+
+        Returns:
+            fitness: array of fitness of each chromosome
+
+        """
+        population_objectives = {}
+        for chromosome in population:
+            key = tuple(chromosome)
+            if key not in population_objectives:
+                entry = self.fitness_cache.get(chromosome)
+                population_objectives[key] = entry[0] if entry is not None else None
+
+                # Chromosomes decoded in a previous run sharing the cache path are not in the archive yet
+                if entry is not None:
+                    self.archive.add(entry[0], list(key))
+
+        missing = [key for key, objectives in population_objectives.items() if objectives is None]
+        if missing:
+            for key, objectives in zip(missing, evaluator.evaluate([list(key) for key in missing])):
+                population_objectives[key] = tuple(float(value) for value in objectives)
+                self.fitness_cache.put(key, population_objectives[key])
+                self.archive.add(population_objectives[key], list(key))
+
+        self.__objectives = [population_objectives[tuple(chromosome)] for chromosome in population]
+
+        return np.array([sum(objectives) for objectives in self.__objectives])
+
+    def __update_best(self, population: List[List[int]], fitness: np.ndarray):
+        """
+            Keep the best chromosome found so far
+        Returns:
+            improved: bool, whether the best chromosome was improved
+
+        """
+        best = int(fitness.argmin())
+        if fitness[best] < self.best_fitness:
+            self.best_fitness = float(fitness[best])
+            self.best_zeta = list(population[best])
+            self.best_objectives = self.__objectives[best]
+
+            return True
+
+        return False
+
+    def __next_generation(self, population: List[List[int]], fitness: np.ndarray):
+        """
+            Build the next generation with elitism, tournament selection, order crossover and mutation
+        Args:
+            population: list of chromosomes
+            fitness: array of fitness of each chromosome
+
+        Returns:
+            offspring: list of chromosomes of the next generation
+
+        """
+        offspring = [list(population[index]) for index in np.argsort(fitness, kind="stable")[:self.elitism]]
+
+        while len(offspring) < self.population_size:
+            first_parent = population[self.__tournament(fitness)]
+            second_parent = population[self.__tournament(fitness)]
+
+            if self.__rng.random() < self.crossover_rate:
+                children = [self.__order_crossover(first_parent, second_parent),
+                            self.__order_crossover(second_parent, first_parent)]
+
+            else:
+                children = [list(first_parent), list(second_parent)]
+
+            for child in children:
+                if self.__rng.random() < self.mutation_rate:
+                    self.__mutate(child)
+
+                if len(offspring) < self.population_size:
+                    offspring.append(child)
+
+        return offspring
+
+    def __tournament(self, fitness: np.ndarray):
+        """
+            Select a chromosome by tournament
+        Returns:
+            index of the selected chromosome
+
+        """
+        contestants = self.__rng.choice(len(fitness), size=min(self.tournament_size, len(fitness)), replace=False)
+
+        return int(contestants[fitness[contestants].argmin()])
+
+    def __order_crossover(self, first_parent: List[int], second_parent: List[int]):
+        """
+            Order crossover (OX): copy a random slice of the first parent and fill the remaining positions with
+            the missing charges in the order they appear in the second parent
+        Returns:
+            child: list of int, permutation of the charges
+
+        """
+        size = len(first_parent)
+        start, end = sorted(self.__rng.choice(size + 1, size=2, replace=False))
+
+        child = [None] * size
+        child[start:end] = first_parent[start:end]
+
+        kept = set(child[start:end])
+        remaining = iter(charge for charge in second_parent if charge not in kept)
+
+        for position in list(range(end, size)) + list(range(start)):
+            child[position] = next(remaining)
+
+        return child
+
+    def __mutate(self, chromosome: List[int]):
+        """
+            Mutate a chromosome in place, either swapping two charges or moving a charge to another position
+        """
+        first, second = self.__rng.choice(len(chromosome), size=2, replace=False)
+
+        if self.__rng.random() < 0.5:
+            chromosome[first], chromosome[second] = chromosome[second], chromosome[first]
+
+        else:
+            chromosome.insert(second, chromosome.pop(first))
@@ -0,0 +1,280 @@
+import bisect
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.continuous_casting.pareto import ParetoArchive
+from src.continuous_casting.simulation import Simulation
+
+# Neighborhoods of a permutation explored by the local search
+NEIGHBORHOODS = ("swap", "insert", "block")
+
+
+class LocalSearch:
+    def __init__(self, instance: Dict, neighborhoods: Sequence[str] = NEIGHBORHOODS, strategy: str = "first",
+                 block_size: int = 3, tabu_size: int = 10000, perturbation: int = 3, time_limit: float = None,
+                 max_iterations: int = None, seed: int = None, lambdas: Tuple[float, float, float] = (1, 1, 1),
+                 flexible_casting: bool = False):
+        """
+            Local search over the permutation of the charges processed in stage 1, decoded by the simulation
+            heuristic. The fitness of a permutation is the sum of its weighted objective values z1 + z2 + z3, to be
+            minimized.
+
+            Neighbors are decoded incrementally by the same simulation, so the instance is parsed once and only the
+            allocations after the first changed position are computed again. The permutations visited recently are
+            kept in a hash set and not decoded again. Once a local optimum is reached, the search stops, unless a
+            budget (time_limit or max_iterations) is given: then the best permutation is perturbed with random
+            block moves and the search goes on from it (iterated local search). The search also stops at a local
+            optimum whose neighbors were all visited already, as there is nothing left to explore around it.
+        Args:
+            instance: dictionary of instance
+            neighborhoods: neighborhoods to explore, among "swap" (exchange two charges), "insert" (move a charge to
+                another position) and "block" (move consecutive charges to another position)
+            strategy: string, "first" to move to the first improving neighbor, or "best" to the best neighbor
+            block_size: int, maximum number of charges moved by a block move
+            tabu_size: int, number of permutations visited recently that are not decoded again
+            perturbation: int, number of random block moves applied to the best permutation at a local optimum
+            time_limit: float, wall-clock budget in seconds (optional)
+            max_iterations: int, maximum number of moves and perturbations (optional)
+            seed: int, seed of the random number generator and of the tie-breaks of the decoder (optional)
+            lambdas: tuple of float, weights (lambda1, lambda2, lambda3) of the objectives z1, z2 and z3
+            flexible_casting: bool, whether Step 9 uses the windows [MinTime, MaxTime] of the casting times
+        """
+        if strategy not in ("first", "best"):
+            raise ValueError("strategy must be 'first' or 'best'")
+
+        if set(neighborhoods) - set(NEIGHBORHOODS):
+            raise ValueError(f"neighborhoods must be among {NEIGHBORHOODS}")
+
+        self.neighborhoods = tuple(neighborhoods)
+        self.strategy = strategy
+        self.block_size = block_size
+        self.tabu_size = tabu_size
+        self.perturbation = perturbation
+        self.time_limit = time_limit
+        self.max_iterations = max_iterations
+        self.lambdas = tuple(lambdas)
+
+        self.simulation = Simulation(instance, name="local search", run=False, headless=True, lambdas=lambdas,
+                                     flexible_casting=flexible_casting, seed=seed)
+
+        self.__rng = np.random.default_rng(seed)
+        self.__visited = OrderedDict()
+        self.__deadline = None
+
+        self.archive = ParetoArchive()
+        self.evaluations = 0
+        self.iterations = 0
+        self.best_zeta = None
+        self.best_objectives = None
+        self.best_fitness = float("inf")
+        self.history = []
+
+    def run(self, zeta: List[int] = None):
+        """
+            Improve a permutation until a local optimum is reached, or until the budget is exhausted
+        Args:
+            zeta: list of int, initial permutation of the charges processed in stage 1 (random if None)
+
+        Returns:
+            best_zeta: list of int, best permutation of the charges processed in stage 1
+            best_objectives: tuple of objective values (z1, z2, z3) of the best permutation
+
+        """
+        self.__deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+
+        if zeta is None:
+            zeta = self.__rng.permutation(self.simulation.charges.in_stage(0)).tolist()
+
+        current = list(zeta)
+        current_fitness = self.__evaluate(current)
+
+        while not self.__exhausted():
+            evaluations = self.evaluations
+            neighbor, neighbor_fitness = self.__explore(current, current_fitness)
+
+            if neighbor is not None:
+                current, current_fitness = neighbor, neighbor_fitness
+
+            elif (self.time_limit is None and self.max_iterations is None) or not self.perturbation or \
+                    self.evaluations == evaluations:
+                break
+
+            else:
+                current = self.__perturb(self.best_zeta)
+                current_fitness = self.__evaluate(current)
+
+            self.iterations += 1
+            self.history.append(self.best_fitness)
+
+        return self.best_zeta, self.best_objectives
+
+    def __exhausted(self):
+        """
+            Check whether the budget is exhausted
+        """
+        if self.__deadline is not None and time.perf_counter() >= self.__deadline:
+            return True
+
+        return self.max_iterations is not None and self.iterations >= self.max_iterations
+
+    def __explore(self, zeta: List[int], fitness: float):
+        """
+            Explore the neighbors of a permutation, skipping the ones visited recently
+        Returns:
+            (neighbor, fitness) of the improving neighbor to move to, or (None, None) if there is none
+        """
+        best_neighbor, best_fitness = None, fitness
+
+        for move in self.__moves(len(zeta)):
+            if self.__exhausted():
+                break
+
+            neighbor = self.apply_move(zeta, move)
+            if tuple(neighbor) in self.__visited:
+                continue
+
+            neighbor_fitness = self.__evaluate(neighbor)
+            if neighbor_fitness < best_fitness:
+                best_neighbor, best_fitness = neighbor, neighbor_fitness
+
+                if self.strategy == "first":
+                    break
+
+        return (best_neighbor, best_fitness) if best_neighbor is not None else (None, None)
+
+    def __moves(self, size: int):
+        """
+            Generate the moves of the neighborhoods. For the first improvement, only a few moves are usually
+            explored, so they are generated lazily in random order: the indexes of the move space are walked from a
+            random offset with a random stride coprime with its size, which visits each of them once. For the best
+            improvement, the order does not matter, so the moves are sorted by decreasing first changed position:
+            consecutive neighbors then share longer prefixes, and more allocations are reused by the decoder.
+        Returns:
+            generator of moves (neighborhood, position, length, new position)
+        """
+        # Moves of each neighborhood (and block length) are indexed by an ordered pair of distinct positions
+        spaces = []
+        for neighborhood in self.neighborhoods:
+            if neighborhood == "block":
+                spaces += [("block", length, size - length + 1) for length in range(2, self.block_size + 1)
+                           if size - length + 1 > 1]
+
+            elif size > 1:
+                spaces.append((neighborhood, 1, size))
+
+        bounds = np.cumsum([0] + [positions * (positions - 1) for _, _, positions in spaces]).tolist()
+        num_moves = bounds[-1]
+
+        if self.strategy == "best":
+            moves = [move for index in range(num_moves) for move in [self.__move(spaces, bounds, index)] if move]
+            first_changed = np.array([min(position, new_position) for _, position, _, new_position in moves])
+            order = self.__rng.permutation(len(moves))
+            order = order[np.argsort(-first_changed[order], kind="stable")]
+
+            for index in order:
+                yield moves[index]
+
+            return
+
+        if not num_moves:
+            return
+
+        offset = int(self.__rng.integers(num_moves))
+        stride = int(self.__rng.integers(1, num_moves)) if num_moves > 1 else 1
+        while math.gcd(stride, num_moves) != 1:
+            stride = int(self.__rng.integers(1, num_moves))
+
+        for step in range(num_moves):
+            move = self.__move(spaces, bounds, (offset + step * stride) % num_moves)
+            if move:
+                yield move
+
+    @staticmethod
+    def __move(spaces: List[Tuple[str, int, int]], bounds: List[int], index: int):
+        """
+            Get the move of an index of the move space
+        Args:
+            spaces: list of (neighborhood, length, number of positions) of the move spaces
+            bounds: list of int, first index of each move space, and number of moves at the end
+            index: int, index of the move
+
+        Returns:
+            move: tuple (neighborhood, position, length, new position), or None for the second index of a swap
+        """
+        space = bisect.bisect_right(bounds, index) - 1
+        neighborhood, length, positions = spaces[space]
+
+        position, new_position = divmod(index - bounds[space], positions - 1)
+        if new_position >= position:
+            new_position += 1
+
+        # A swap of two positions is the same whichever comes first
+        if neighborhood == "swap" and new_position < position:
+            return None
+
+        return neighborhood, position, length, new_position
+
+    @staticmethod
+    def apply_move(zeta: List[int], move: Tuple[str, int, int, int]):
+        """
+            Apply a move to a permutation
+        Args:
+            zeta: list of int, permutation of the charges processed in stage 1
+            move: tuple (neighborhood, position, length, new position). A swap exchanges the charges at position
+                and new position, an insert or block move takes length charges from position and puts them back
+                so that the first one ends at new position
+
+        Returns:
+            neighbor: list of int, new permutation
+        """
+        neighborhood, position, length, new_position = move
+        neighbor = list(zeta)
+
+        if neighborhood == "swap":
+            neighbor[position], neighbor[new_position] = neighbor[new_position], neighbor[position]
+
+        else:
+            block = neighbor[position:position + length]
+            del neighbor[position:position + length]
+            neighbor[new_position:new_position] = block
+
+        return neighbor
+
+    def __perturb(self, zeta: List[int]):
+        """
+            Apply random block moves to a permutation
+        """
+        size = len(zeta)
+        for _ in range(self.perturbation):
+            length = int(self.__rng.integers(1, min(self.block_size, size) + 1))
+            position, new_position = self.__rng.integers(0, size - length + 1, size=2)
+            zeta = self.apply_move(zeta, ("block", int(position), length, int(new_position)))
+
+        return zeta
+
+    def __evaluate(self, zeta: List[int]):
+        """
+            Decode a permutation, keep it in the set of visited permutations and update the best one
+        Returns:
+            fitness: float, sum of the weighted objective values
+        """
+        objectives = tuple(float(value) for value in self.simulation.decode(zeta))
+        fitness = sum(objectives)
+        self.evaluations += 1
+
+        self.__visited[tuple(zeta)] = None
+        if len(self.__visited) > self.tabu_size:
+            self.__visited.popitem(last=False)
+
+        self.archive.add(objectives, list(zeta))
+
+        if fitness < self.best_fitness:
+            self.best_fitness = fitness
+            self.best_zeta = list(zeta)
+            self.best_objectives = objectives
+
+        return fitness
@@ -1,14 +1,18 @@
 from copy import copy
+from datetime import datetime
 from typing import Dict
 
+import numpy as np
 import pendulum
+import pytz
 
 
 class Machines:
     def __init__(self, instance):
         self.__num_machines = len(instance["Machine"])
 
-        self.earliest_available_time = {}
+        self.epoch = None
+        self.earliest_available_time = None
         self.__init_earliest_available_time(instance)
 
         self.stage = {}
@@ -16,13 +20,22 @@ class Machines:
 
         self.last_stage = self.stage[self.__num_machines - 1]
 
-        self.current_earliest_available_time = copy(self.earliest_available_time)
+        self.__machines_in_stage = {}
+        self.__init_machines_in_stage()
 
-        self.__transport_time = {key: {} for key in list(range(self.__num_machines))}
+        self.transport_times = None
         self.__init_transport_time(instance)
 
-        self.allocation = {key: {"Allocation": [], "StartingTime": [], "EndingTime": []} for key in
-                           list(range(0, self.__num_machines))}
+        self.__initial_earliest_available_time = copy(self.earliest_available_time)
+        self.reset()
+
+    def reset(self):
+        """
+            Restore the scheduling state (earliest available times) of every machine, keeping the instance data
+            already parsed
+        """
+        self.earliest_available_time = copy(self.__initial_earliest_available_time)
+        self.current_earliest_available_time = copy(self.__initial_earliest_available_time)
 
     @property
     def num_machines(self):
@@ -30,13 +43,23 @@ class Machines:
 
     def __init_earliest_available_time(self, instance: Dict):
         """
-            Function to initiate dictionary of earliest available time, indexed by machine id
+            Function to initiate array of earliest available time, indexed by machine id.
+
+            The epoch of the instance is the earliest of these times, and every time handled while scheduling
+            is expressed in minutes since this epoch
         Args:
             instance: dictionary of instance
 
         """
-        for index, row in instance['Earliest_available_time'].iterrows():
-            self.earliest_available_time[row["MachineID"]] = pendulum.from_format(row["EAT"], 'YYYY-MM-DD HH:mm:ss')
+        table = instance['Earliest_available_time']
+
+        # Seconds since 1970-01-01 UTC, times are given as 'YYYY-MM-DD HH:mm:ss'
+        earliest_available_time = np.asarray(table["EAT"], dtype="datetime64[s]").astype(np.int64)
+
+        self.epoch = pendulum.from_timestamp(int(earliest_available_time.min()))
+        self.earliest_available_time = np.zeros(self.__num_machines)
+        self.earliest_available_time[np.asarray(table["MachineID"])] = \
+            (earliest_available_time - earliest_available_time.min()) / 60
 
     def __init_stage(self, instance: Dict):
         """
@@ -45,58 +68,106 @@ class Machines:
             instance: dictionary of instance
 
         """
-        for index, row in instance['Stage'].iterrows():
-            self.stage[row["MachineID"]] = row["StageID"]
+        for machine_id, stage in zip(instance['Stage']["MachineID"].tolist(), instance['Stage']["StageID"].tolist()):
+            self.stage[machine_id] = stage
 
-    def __init_transport_time(self, instance):
+    def __init_machines_in_stage(self):
         """
-            Function to initiate dictionary of transport time, indexed by first machine
-        Args:
-            instance: dictionary of instance
+            Function to initiate dictionary of machines in each stage, indexed by stage
         """
+        machines_in_stage = {stage: [] for stage in range(self.last_stage + 1)}
+        for machine_id, stage in self.stage.items():
+            machines_in_stage[stage].append(machine_id)
 
-        for index, row in instance['Transport_Time'].iterrows():
-            transport_line = row["Transport_line"].split("-")
-            self.__transport_time[int(transport_line[0])][int(transport_line[1])] = row["Transport_Time"]
+        for stage, machines in machines_in_stage.items():
+            self.__machines_in_stage[stage] = np.array(sorted(machines), dtype=int)
+            self.__machines_in_stage[stage].setflags(write=False)
 
-        delete_keys = []
-        for key in self.__transport_time.keys():
-            if self.__transport_time[key] == {}:
-                delete_keys.append(key)
+    def __init_transport_time(self, instance: Dict):
+        """
+            Function to initiate the dense matrix of transport time, indexed by first and second machine.
 
-        for key in delete_keys:
-            del self.__transport_time[key]
+            Its last row holds the transport time of charges without a previous machine (all 0), so it is
+            indexed with -1 for them. Transport lines missing from the instance are infinite.
+        Args:
+            instance: dictionary of instance
+        """
+        self.transport_times = np.full((self.__num_machines + 1, self.__num_machines), np.inf)
+        self.transport_times[-1, :] = 0
+
+        table = instance['Transport_Time']
+        for transport_line, transport_time in zip(table["Transport_line"], table["Transport_Time"]):
+            transport_line = transport_line.split("-")
+            self.transport_times[int(transport_line[0]), int(transport_line[1])] = transport_time
 
     def in_stage(self, h: int):
         """
-            Get list of machines from stage h
+            Get machines from stage h
         Args:
             h: stage
 
         Returns:
-            machines_in_stage: list of int, contains indexes of machines from stage h
+            machines_in_stage: read-only array of int, contains indexes of machines from stage h
 
         """
 
-        machines_in_stage = []
-        for machine_id, stage in self.stage.items():
-            if h == stage:
-                machines_in_stage.append(machine_id)
-
-        return machines_in_stage
+        return self.__machines_in_stage[h]
 
     def allocate(self, charge_index, machine_index, starting_time, ending_time):
-        self.allocation[machine_index]["Allocation"].append(charge_index)
-        self.allocation[machine_index]["StartingTime"].append(starting_time)
-        self.allocation[machine_index]["EndingTime"].append(ending_time)
-
+        """
+            Update the state of a machine allocated to a charge, the allocation itself is kept in the Schedule
+        """
         self.current_earliest_available_time[machine_index] = ending_time
         self.earliest_available_time[machine_index] = ending_time
 
+    def allocate_sequence(self, machine_indexes: np.ndarray, ending_times: np.ndarray):
+        """
+            Update the state of the machines allocated to a sequence of charges at once, as if allocated one by one
+            in order: each machine is available at the ending time of the last charge allocated to it
+        Args:
+            machine_indexes: array of int, machine allocated to each charge
+            ending_times: array of float, ending time of each charge
+        """
+        # Later allocations of a machine replace the earlier ones
+        last_ending_times = dict(zip(machine_indexes.tolist(), ending_times.tolist()))
+        allocated_machines = list(last_ending_times)
+
+        self.current_earliest_available_time[allocated_machines] = list(last_ending_times.values())
+        self.earliest_available_time[allocated_machines] = list(last_ending_times.values())
+
+    def to_timestamp(self, minutes):
+        """
+            Convert a time in minutes since the epoch of the instance into a POSIX timestamp
+        Args:
+            minutes: float, minutes since the epoch
+
+        Returns:
+            timestamp: float, seconds since 1970-01-01 UTC
+
+        """
+        return self.epoch.timestamp() + minutes * 60
+
+    def to_datetime(self, minutes):
+        """
+            Convert a time in minutes since the epoch of the instance into a UTC datetime
+        Args:
+            minutes: float, minutes since the epoch
+
+        Returns:
+            datetime in UTC
+
+        """
+        return datetime.fromtimestamp(self.to_timestamp(minutes), pytz.utc)
+
     def transport_time(self, previous_machine, next_machine):
-        if not previous_machine:
+        """
+            Get transport time between two machines
+        Args:
+            previous_machine: int, index of the first machine, -1 if there is no previous machine
+            next_machine: int, index of the second machine
 
-            return 0
+        Returns:
+            transport time in minutes
 
-        else:
-            return self.__transport_time[previous_machine][next_machine]
+        """
+        return self.transport_times[previous_machine, next_machine]
@@ -0,0 +1,122 @@
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+class ParetoArchive:
+    def __init__(self, num_objectives: int = 3):
+        """
+            Archive of the non-dominated solutions found, e.g. by an optimizer, for objectives to be minimized.
+
+            The archive is kept sorted by the first objective, so the solutions that may dominate a new one (the
+            ones with a lower or equal first objective) and the ones it may dominate (with a greater or equal first
+            objective) are found by binary search, and only those are compared with it, at once.
+        Args:
+            num_objectives: int, number of objectives, e.g. 3 for (z1, z2, z3)
+        """
+        self.num_objectives = num_objectives
+
+        # Objective values by column, the first len(archive) columns are used
+        self.__columns = np.empty((num_objectives, 64))
+        self.__size = 0
+        self.__solutions = []
+
+    def add(self, objectives: Sequence[float], solution=None):
+        """
+            Add a solution unless it is dominated by, or equal to, a solution of the archive, removing the solutions
+            it dominates
+        Args:
+            objectives: objective values of the solution
+            solution: solution, e.g. a permutation of the charges processed in stage 1
+
+        Returns:
+            added: bool, whether the solution was added
+        """
+        point = np.asarray(objectives, dtype=float)
+        columns = self.__columns[:, :self.__size]
+
+        lower = np.searchsorted(columns[0], point[0], side="left")
+        upper = np.searchsorted(columns[0], point[0], side="right")
+
+        dominating = columns[0, :upper] <= point[0]
+        for objective in range(1, self.num_objectives):
+            dominating &= columns[objective, :upper] <= point[objective]
+
+        if dominating.any():
+            return False
+
+        dominated = columns[0, lower:] >= point[0]
+        for objective in range(1, self.num_objectives):
+            dominated &= columns[objective, lower:] >= point[objective]
+
+        if dominated.any():
+            kept = np.flatnonzero(~dominated) + lower
+            self.__size = lower + len(kept)
+            self.__columns[:, lower:self.__size] = self.__columns[:, kept]
+            self.__solutions = self.__solutions[:lower] + [self.__solutions[index] for index in kept]
+
+        if self.__size == self.__columns.shape[1]:
+            self.__columns = np.concatenate((self.__columns, np.empty_like(self.__columns)), axis=1)
+
+        self.__columns[:, lower + 1:self.__size + 1] = self.__columns[:, lower:self.__size]
+        self.__columns[:, lower] = point
+        self.__size += 1
+        self.__solutions.insert(lower, solution)
+
+        return True
+
+    def update(self, candidates: Iterable[Tuple[Sequence[float], object]]):
+        """
+            Add many solutions
+        Args:
+            candidates: iterable of (objectives, solution)
+
+        Returns:
+            added: int, number of solutions added (some of them may have been removed by later ones)
+        """
+        return sum(self.add(objectives, solution) for objectives, solution in candidates)
+
+    @property
+    def objectives(self):
+        """
+            Objective values of the solutions of the archive, sorted by the first objective
+        Returns:
+            objectives: read-only array of shape (len(archive), num_objectives)
+        """
+        objectives = self.__columns[:, :self.__size].T.copy()
+        objectives.setflags(write=False)
+
+        return objectives
+
+    @property
+    def solutions(self):
+        """
+            Solutions of the archive, in the order of objectives
+        """
+        return list(self.__solutions)
+
+    def best(self, weights: Sequence[float] = None):
+        """
+            Pick the solution of the archive with the lowest weighted sum of its objectives
+        Args:
+            weights: weight of each objective, e.g. (lambda1, lambda2, lambda3) (all 1 if None)
+
+        Returns:
+            (objectives, solution) of the picked solution
+        """
+        if not self.__solutions:
+            raise ValueError("the archive is empty")
+
+        weights = np.ones(self.num_objectives) if weights is None else np.asarray(weights, dtype=float)
+        best = int((weights @ self.__columns[:, :self.__size]).argmin())
+
+        return tuple(self.__columns[:, best].tolist()), self.__solutions[best]
+
+    def __len__(self):
+        return len(self.__solutions)
+
+    def __iter__(self):
+        """
+            Iterate over (objectives, solution) of the archive, sorted by the first objective
+        """
+        return zip(map(tuple, self.objectives.tolist()), self.__solutions)
@@ -0,0 +1,130 @@
+import json
+import time
+from functools import wraps
+
+
+class Profile:
+    def __init__(self):
+        """
+            Statistics of the hot path of simulations: cumulative time and number of calls of the timed sections,
+            and counts of the counted events. A simulation is only instrumented when given a profile, so the
+            simulations without one run unchanged.
+
+                timers: cumulative time in seconds of each timed section, indexed by name
+                calls: number of calls of each timed section, indexed by name
+                counters: number of occurrences of each counted event, indexed by name
+        """
+        self.timers = {}
+        self.calls = {}
+        self.counters = {}
+
+    def reset(self):
+        """
+            Set the statistics back to 0, keeping the sections and events of the functions already wrapped
+        """
+        for statistics in (self.timers, self.calls, self.counters):
+            for name in statistics:
+                statistics[name] = type(statistics[name])()
+
+    def timed(self, name: str, function):
+        """
+            Wrap a function to add its running time to the timer and its calls to the call count of a section
+        Args:
+            name: string, name of the section
+            function: function to time
+
+        Returns:
+            wrapper: function with the same arguments and result
+        """
+        self.timers.setdefault(name, 0.0)
+        self.calls.setdefault(name, 0)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+
+            finally:
+                self.timers[name] += time.perf_counter() - start
+                self.calls[name] += 1
+
+        return wrapper
+
+    def counted(self, name: str, function, condition=None):
+        """
+            Wrap a function to count its calls as an event
+        Args:
+            name: string, name of the event
+            function: function to count
+            condition: function of the result, only the calls whose result meets it are counted (optional)
+
+        Returns:
+            wrapper: function with the same arguments and result
+        """
+        self.counters.setdefault(name, 0)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            result = function(*args, **kwargs)
+            if condition is None or condition(result):
+                self.counters[name] += 1
+
+            return result
+
+        return wrapper
+
+    def summed(self, name: str, function):
+        """
+            Wrap a function returning a number of events, to add it to their count
+        Args:
+            name: string, name of the events
+            function: function returning the number of events, an int
+
+        Returns:
+            wrapper: function with the same arguments and result
+        """
+        self.counters.setdefault(name, 0)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            result = function(*args, **kwargs)
+            self.counters[name] += result
+
+            return result
+
+        return wrapper
+
+    def to_dict(self):
+        """
+            Get the statistics
+        Returns:
+            statistics: dictionary of the timers, calls, mean time per call and counters, indexed by name
+        """
+        return {"timers": dict(self.timers),
+                "calls": dict(self.calls),
+                "mean": {name: self.timers[name] / self.calls[name] for name in self.timers if self.calls[name]},
+                "counters": dict(self.counters)}
+
+    def to_json(self, path: str = None):
+        """
+            Export the statistics as JSON
+        Args:
+            path: path of the file to write (optional)
+
+        Returns:
+            statistics: JSON string of the statistics
+        """
+        statistics = json.dumps(self.to_dict(), indent=2)
+
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(statistics)
+
+        return statistics
+
+    def __str__(self):
+        lines = [f"{name}: {self.timers[name]:.6f} s in {self.calls[name]} calls" for name in self.timers]
+        lines += [f"{name}: {count}" for name, count in self.counters.items()]
+
+        return "\n".join(lines)
@@ -0,0 +1,60 @@
+import logging
+
+
+class Reporter:
+    """
+        Reporter of the progress of a simulation. The base reporter ignores every event, so the simulation runs
+        headless.
+    """
+
+    def step(self, simulation, step: int):
+        """
+            Called when the simulation enters a step of the heuristic
+        Args:
+            simulation: Simulation being run
+            step: int, number of the step (1 to 9)
+        """
+
+    def end(self, simulation):
+        """
+            Called when the simulation ends, once the objective values are computed
+        Args:
+            simulation: Simulation being run
+        """
+
+
+class PrintReporter(Reporter):
+    """
+        Print every step of the heuristic
+    """
+
+    def step(self, simulation, step: int):
+        print(f"Step {step}")
+
+    def end(self, simulation):
+        print("End of simulation")
+
+
+class LoggingReporter(Reporter):
+    def __init__(self, logger: logging.Logger = None, step_level: int = logging.DEBUG, end_level: int = logging.INFO):
+        """
+            Log the steps and the result of the simulation, with the details as extra attributes of the log records
+        Args:
+            logger: logger to use (the logger of this module if None)
+            step_level: int, level of the records of the steps
+            end_level: int, level of the record of the end of the simulation
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.step_level = step_level
+        self.end_level = end_level
+
+    def step(self, simulation, step: int):
+        if self.logger.isEnabledFor(self.step_level):
+            self.logger.log(self.step_level, "%s: step %d (stage %d)", simulation.name, step, simulation.h,
+                            extra={"simulation": simulation.name, "step": step, "stage": simulation.h})
+
+    def end(self, simulation):
+        if self.logger.isEnabledFor(self.end_level):
+            self.logger.log(self.end_level, "%s: z1=%s z2=%s z3=%s", simulation.name, simulation.z1, simulation.z2,
+                            simulation.z3, extra={"simulation": simulation.name, "z1": simulation.z1,
+                                                  "z2": simulation.z2, "z3": simulation.z3})
@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import to_table
+
+# Columns of the processing time tables, indexed by type of processing time
+PROCESSING_TIME_COLUMNS = {"MinTime": "MinTime", "StandardTime": "Standard_Time", "MaxTime": "MaxTime"}
+
+
+class ScheduleChange:
+    def __init__(self, unavailable_until: Dict[int, float] = None, new_charges: Dict[int, Dict] = None,
+                 removed_charges: Iterable[int] = (), processing_times: Dict[Tuple[int, int], Dict] = None):
+        """
+            Changes of the plant to take into account when rescheduling
+        Args:
+            unavailable_until: dictionary of time in minutes since the epoch until which a machine is unavailable
+                (e.g. a breakdown), indexed by machine index
+            new_charges: dictionary of new charges, indexed by charge index, each one cast after the charges already
+                planned on its caster
+                    └── CC: machine index of the predefined continuous caster
+                    └── CastID: cast index
+                    └── ChargeRoute: stage route of this charge, which is composed of stage index
+                    └── ProcessingTime: dictionary of processing times (MinTime, StandardTime, MaxTime), indexed by
+                        stage of the route
+            removed_charges: indexes of the charges removed from the cast plan, which must not have started
+            processing_times: dictionary of new processing times (any of MinTime, StandardTime, MaxTime),
+                indexed by (charge index, stage). Operations already started keep their times
+        """
+        self.unavailable_until = dict(unavailable_until or {})
+        self.new_charges = dict(new_charges or {})
+        self.removed_charges = set(removed_charges)
+        self.processing_times = dict(processing_times or {})
+
+
+def apply_change(instance: Dict, change: ScheduleChange, last_stage: int):
+    """
+        Function to apply the new, removed and changed charges of a change to the tables of an instance.
+        The machines are unchanged, so the epoch of the instance is kept.
+    Args:
+        instance: dictionary of instance, of structured arrays or DataFrames
+        change: ScheduleChange to apply
+        last_stage: int, continuous casting stage
+
+    Returns:
+        instance: dictionary of the changed instance, the tables of the original instance are not modified and the
+            changed ones are structured arrays
+    """
+    instance = dict(instance)
+    for table in ("Cast_plan", "CC_Processing_Time", "nonCC_Processing_Time"):
+        instance[table] = to_table(instance[table])
+
+    existing = set(instance["Cast_plan"]["ChargeID"].tolist())
+    if existing & set(change.new_charges):
+        raise ValueError(f"charges {sorted(existing & set(change.new_charges))} are already in the cast plan")
+
+    if change.removed_charges - existing:
+        raise ValueError(f"charges {sorted(change.removed_charges - existing)} are not in the cast plan")
+
+    cast_plan_rows = []
+    cc_rows = []
+    non_cc_rows = []
+    for charge, plan in sorted(change.new_charges.items()):
+        route = [int(stage) for stage in plan["ChargeRoute"]]
+        if route[-1] != last_stage:
+            raise ValueError(f"the route of charge {charge} must end in the continuous casting stage")
+
+        cast_plan_rows.append((charge, plan["CastID"], plan["CC"], "-".join(str(stage) for stage in route)))
+        for stage in route:
+            times = tuple(plan["ProcessingTime"][stage][pt_type] for pt_type in PROCESSING_TIME_COLUMNS)
+            if stage == last_stage:
+                cc_rows.append((plan["CC"], charge) + times)
+
+            else:
+                non_cc_rows.append((stage, charge) + times)
+
+    changed = dict(instance)
+    changed["Cast_plan"] = _change_rows(instance["Cast_plan"], change.removed_charges, cast_plan_rows)
+    changed["CC_Processing_Time"] = _change_rows(instance["CC_Processing_Time"], change.removed_charges, cc_rows)
+    changed["nonCC_Processing_Time"] = _change_rows(instance["nonCC_Processing_Time"], change.removed_charges,
+                                                    non_cc_rows)
+
+    for (charge, stage), times in change.processing_times.items():
+        if stage == last_stage:
+            table = changed["CC_Processing_Time"]
+            rows = table["ChargeID"] == charge
+
+        else:
+            table = changed["nonCC_Processing_Time"]
+            rows = (table["ChargeID"] == charge) & (table["StageID"] == stage)
+
+        if not rows.any():
+            raise ValueError(f"charge {charge} is not processed in stage {stage}")
+
+        for pt_type, time in times.items():
+            table[PROCESSING_TIME_COLUMNS[pt_type]][rows] = time
+
+    return changed
+
+
+def _change_rows(table: np.ndarray, removed_charges: set, new_rows: list):
+    """
+        Copy a table without the rows of the removed charges and with new rows at the end, widening the string
+        columns if needed
+    """
+    rows = table[~np.isin(table["ChargeID"], list(removed_charges))].tolist() + new_rows
+
+    dtype = []
+    for index, name in enumerate(table.dtype.names):
+        field = table.dtype[name]
+        if field.kind == "U":
+            field = np.dtype(f"U{max([field.itemsize // 4] + [len(str(row[index])) for row in new_rows])}")
+
+        dtype.append((name, field))
+
+    return np.array(rows, dtype=dtype)
+
+
+def reschedule(simulation: Simulation, now: float, change: ScheduleChange = None):
+    """
+        Function to reschedule a decoded simulation at a given time, with changes of the plant.
+
+        The operations started before now are frozen. The other operations are decoded again with the heuristic,
+        keeping the stage 1 order of the charges of the simulation (new charges go last), and none of them starts
+        before now or before the end of the unavailability of its machine.
+    Args:
+        simulation: Simulation whose schedule is committed, already decoded
+        now: float, time of the rescheduling, in minutes since the epoch of the instance
+        change: ScheduleChange to take into account (optional)
+
+    Returns:
+        simulation: new Simulation, decoded, with the same parameters as the original one
+    """
+    if simulation.initial_zeta is None:
+        raise ValueError("the simulation must be decoded before rescheduling")
+
+    change = change or ScheduleChange()
+    schedule = simulation.schedule
+
+    frozen = []
+    for operation in np.flatnonzero(schedule.starting_time < now):
+        charge = int(schedule.operation_charge[operation])
+        if charge in change.removed_charges:
+            raise ValueError(f"charge {charge} has already started, it cannot be removed")
+
+        frozen.append((charge, int(schedule.operation_stage[operation]), int(schedule.machine[operation]),
+                       float(schedule.starting_time[operation]), float(schedule.ending_time[operation])))
+
+    instance = apply_change(simulation.instance, change, simulation.machines.last_stage)
+
+    rescheduled = Simulation(instance, simulation.name, run=False, headless=simulation.headless,
+                             reporter=simulation.reporter, lambdas=simulation.lambdas,
+                             flexible_casting=simulation.flexible_casting, seed=simulation.seed,
+                             tie_break=simulation.tie_break)
+    rescheduled.freeze(frozen, now, change.unavailable_until)
+
+    zeta = [charge for charge in simulation.initial_zeta if charge not in change.removed_charges]
+    zeta += sorted(charge for charge, plan in change.new_charges.items() if 0 in plan["ChargeRoute"])
+    rescheduled.decode(zeta)
+
+    return rescheduled
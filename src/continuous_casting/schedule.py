@@ -0,0 +1,126 @@
+from copy import copy
+
+import numpy as np
+
+
+class Schedule:
+    def __init__(self, charges, num_machines: int):
+        """
+            Columnar store of a schedule. Operations are the (charge, stage) pairs of the charge routes, numbered
+            charge by charge in route order, so the operations of a charge are contiguous.
+
+                operation_charge: charge of each operation
+                operation_stage: stage of each operation
+                has_next_operation: whether each operation is followed by another one in the route of its charge
+                machine: machine allocated to each operation (-1 if not allocated yet)
+                starting_time: starting time of each operation, in minutes since the epoch (nan if not allocated)
+                ending_time: ending time of each operation, in minutes since the epoch (nan if not allocated)
+                machine_operations: list of operations allocated to each machine, in allocation order
+        Args:
+            charges: Charges of the instance
+            num_machines: int, number of machines
+        """
+        self.num_machines = num_machines
+
+        charge_ids = sorted(charges.cast_plan)
+        routes = [charges.cast_plan[charge]["ChargeRoute"] for charge in charge_ids]
+
+        self.operation_charge = np.repeat(charge_ids, [len(route) for route in routes])
+        self.operation_stage = np.concatenate(routes).astype(int)
+        self.has_next_operation = np.append(self.operation_charge[:-1] == self.operation_charge[1:], False)
+
+        # Operations of charge i are first_operation[i] to first_operation[i + 1] - 1
+        route_lengths = np.zeros(max(charge_ids) + 1, dtype=int)
+        route_lengths[charge_ids] = [len(route) for route in routes]
+        self.first_operation = np.concatenate(([0], np.cumsum(route_lengths)))
+
+        self.__route_position = charges.route_position
+
+        self.machine = np.full(len(self.operation_charge), -1)
+        self.starting_time = np.full(len(self.operation_charge), np.nan)
+        self.ending_time = np.full(len(self.operation_charge), np.nan)
+        self.machine_operations = [[] for _ in range(num_machines)]
+
+    @property
+    def num_operations(self):
+        return len(self.operation_charge)
+
+    def reset(self):
+        """
+            Remove every allocation, keeping the operations
+        """
+        self.machine.fill(-1)
+        self.starting_time.fill(np.nan)
+        self.ending_time.fill(np.nan)
+        self.machine_operations = [[] for _ in range(self.num_machines)]
+
+    def copy(self):
+        """
+            Copy the schedule, sharing the fixed description of the operations
+        Returns:
+            schedule: Schedule with the same allocations
+        """
+        schedule = copy(self)
+        schedule.machine = self.machine.copy()
+        schedule.starting_time = self.starting_time.copy()
+        schedule.ending_time = self.ending_time.copy()
+        schedule.machine_operations = [list(operations) for operations in self.machine_operations]
+
+        return schedule
+
+    def operation(self, charge_index: int, stage: int):
+        """
+            Get the operation of a charge in a stage
+        Args:
+            charge_index: int, index of charge
+            stage: int, stage of the charge route
+
+        Returns:
+            operation: int, index of the operation
+        """
+        return self.first_operation[charge_index] + self.__route_position[charge_index, stage]
+
+    def charge_operations(self, charge_index: int):
+        """
+            Get the operations of a charge, in route order
+        Args:
+            charge_index: int, index of charge
+
+        Returns:
+            operations: range of operation indexes
+        """
+        return range(self.first_operation[charge_index], self.first_operation[charge_index + 1])
+
+    def allocate(self, charge_index: int, stage: int, machine_index: int, starting_time: float, ending_time: float):
+        """
+            Allocate the operation of a charge in a stage to a machine, after the operations already allocated to it
+        Returns:
+            operation: int, index of the operation
+        """
+        operation = self.first_operation[charge_index] + self.__route_position[charge_index, stage]
+
+        self.machine[operation] = machine_index
+        self.starting_time[operation] = starting_time
+        self.ending_time[operation] = ending_time
+        self.machine_operations[machine_index].append(operation)
+
+        return operation
+
+    def allocate_sequence(self, charge_indexes: np.ndarray, stage: int, machine_indexes: np.ndarray,
+                          starting_times: np.ndarray, ending_times: np.ndarray):
+        """
+            Allocate the operations of distinct charges in a stage at once, as if allocated one by one in order
+        Args:
+            charge_indexes: array of int, indexes of charges
+            stage: int, stage of the operations
+            machine_indexes: array of int, machine allocated to each operation
+            starting_times: array of float, starting time of each operation
+            ending_times: array of float, ending time of each operation
+        """
+        operations = self.first_operation[charge_indexes] + self.__route_position[charge_indexes, stage]
+
+        self.machine[operations] = machine_indexes
+        self.starting_time[operations] = starting_times
+        self.ending_time[operations] = ending_times
+        for operation, machine_index in zip(operations.tolist(), machine_indexes.tolist()):
+            self.machine_operations[machine_index].append(operation)
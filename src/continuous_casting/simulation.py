@@ -1,39 +1,239 @@
+from collections import deque
 from copy import copy
-from random import shuffle
-from datetime import datetime
-import pandas as pd
-import plotly.figure_factory as ff
-import pytz
+from heapq import heapify, heappop, heappush
 
-from src.continuous_casting.charges import Charges
+import numpy as np
+
+from src.continuous_casting.charges import PROCESSING_TIME_TYPES, Charges
 from src.continuous_casting.machines import Machines
+from src.continuous_casting.reporters import PrintReporter, Reporter
+from src.continuous_casting.schedule import Schedule
 
 
 class Simulation:
-    def __init__(self, instance, name):
+    def __init__(self, instance, name, zeta=None, run=True, headless=False, reporter=None, lambdas=(1, 1, 1),
+                 flexible_casting=False, seed=None, tie_break="random", profile=None):
         """
-            Initialize current earliest available time (tau_i) for each charge to 0
-            and current earliest available time (mu_m) for each machine to the
-            earliest available time (et_m). Set stage index (h=1).
+            Parse the instance into charges and machines once. Unless run is False, the heuristic is executed
+            right away and, unless headless, the Gantt chart of the resulting schedule is shown.
+        Args:
+            instance: dictionary of instance
+            name: string, name of the simulation, used as title of the Gantt chart
+            zeta: list of int, permutation of the charges processed in stage 1 (drawn from the seed if None)
+            run: bool, whether to run the heuristic on construction
+            headless: bool, if True nothing is plotted nor printed (unless a reporter is given)
+            reporter: Reporter of the steps of the heuristic (prints them by default, silent if headless)
+            lambdas: tuple of float, weights (lambda1, lambda2, lambda3) of the objectives z1, z2 and z3
+            flexible_casting: bool, whether Step 9 uses the windows [MinTime, MaxTime] of the casting times
+            seed: int or numpy.random.SeedSequence, seed of the random permutations and of the tie-breaks
+                (optional). Simulations of the same instance with the same seed give the same schedules, in any
+                process
+            tie_break: string, "random" to break ties between equally early machines at random (seeded), or
+                "first" to always take the first of them
+            profile: Profile collecting the time spent in the steps of the heuristic and the allocation counts
+                (optional). Without a profile, the simulation is not instrumented at all
         """
 
-        print("Step 1")
         self.name = name
+        self.instance = instance
+        self.headless = headless
+        self.reporter = reporter or (Reporter() if headless else PrintReporter())
+        self.lambdas = tuple(lambdas)
+        self.flexible_casting = flexible_casting
+        self.seed = seed
+        self.tie_break = tie_break
+        self.profile = profile
         self.charges = Charges(instance)  # Setting charges
         self.machines = Machines(instance)  # Setting machines
+        self.schedule = Schedule(self.charges, self.machines.num_machines)  # Setting schedule
+
+        # Operations evaluated by the objectives, and standard processing time of each operation
+        self.__last_stage_operations = np.flatnonzero(self.schedule.operation_stage == self.machines.last_stage)
+        self.__operations_with_next = np.flatnonzero(self.schedule.has_next_operation)
+        self.__standard_process_time = self.charges.processing_times[PROCESSING_TIME_TYPES["StandardTime"],
+                                                                     self.schedule.operation_charge,
+                                                                     self.schedule.operation_stage]
+
+        self.gantt_data = {"Task": [], "Start": [], "Finish": [], "Complete": []}
+
+        self.instance_data = {'num_charges': len(self.charges.cast_plan),
+                              'num_machines': self.machines.num_machines,
+                              'num_stages': self.machines.last_stage}
+
+        self.__charges_first_stage = sorted(self.charges.in_stage(0).tolist())
+
+        # Position of each machine in its stage, and transport times as lists for the dispatcher of Step 5
+        self.__machine_position = np.zeros(self.machines.num_machines, dtype=int)
+        for stage in range(self.machines.last_stage + 1):
+            self.__machine_position[self.machines.in_stage(stage)] = np.arange(len(self.machines.in_stage(stage)))
+        self.__machine_position = self.__machine_position.tolist()
+        self.__transport_times = self.machines.transport_times.tolist()
+        self.__machine_heap = []
+
+        if tie_break not in ("random", "first"):
+            raise ValueError("tie_break must be 'random' or 'first'")
+
+        # Random priority of each machine for each charge, the tied machine with the lowest priority is taken.
+        # A tie-break only depends on the charge and the tied machines, so it does not depend on the order of the
+        # decodes and the allocations recorded for incremental decoding stay valid
+        self.__rng = np.random.default_rng(seed)
+        self.__tie_break_priority = None
+        if tie_break == "random":
+            self.__tie_break_priority = self.__rng.random((len(self.charges.previous_machine),
+                                                           self.machines.num_machines))
+
+        # Allocations of the previous decode, indexed by stage (and caster, in the last stage), as columns
+        # (charge, tau_i, previous machine, machine, starting time, ending time) in allocation order
+        self.__traces = {}
+        self.__trace_key = None
+        self.__trace_prefix = None
+        self.__trace = []
+        self.__incremental = True
+
+        # Whether the current decode computed any allocation, and times of the last stage adjusted by Step 9 in
+        # the previous decode, restored when every allocation is reused
+        self.__computed_allocations = False
+        self.__adjusted_times = None
+
+        # Allocations kept unchanged by the decodes, see freeze
+        self.__frozen_allocations = []
+        self.__frozen_operations = np.zeros(self.schedule.num_operations, dtype=bool)
+        self.__machines_not_before = None
+
+        self.reset()
+
+        if profile is not None:
+            self.__instrument(profile)
+
+        if run:
+            self.decode(zeta)
+
+            if not headless:
+                self.plot_gantt()
+
+    def __instrument(self, profile):
+        """
+            Replace the steps and the hot-path methods of this simulation by wrappers updating the profile:
+                - decode: whole decodes
+                - sequence: Step 3, generation of the permutation zeta of each stage
+                - allocation: Step 5, allocation of a charge in stages 1 to H-1
+                - last_stage_allocation: Step 8, allocation of the charges to the casters
+                - caster_adjustment: Step 9, adjustment of the casters
+                - objectives: computation of the objective values
+            and counting the allocations reused from the previous decode and the ones computed.
+        Args:
+            profile: Profile to update
+        """
+        self.decode = profile.timed("decode", self.decode)
+        self.__step_3 = profile.timed("sequence", self.__step_3)
+        self.__step_5 = profile.timed("allocation", self.__step_5)
+        self.__allocate_last_stage = profile.timed("last_stage_allocation", self.__allocate_last_stage)
+        self.__adjust_casters = profile.timed("caster_adjustment", self.__adjust_casters)
+        self.__adjust_casts = profile.timed("caster_adjustment", self.__adjust_casts)
+        self.objective_functions = profile.timed("objectives", self.objective_functions)
+
+        self.__replay_trace = profile.summed("reused_allocations", self.__replay_trace)
+        self.__record_allocation = profile.counted("computed_allocations", self.__record_allocation)
+
+    def reset(self):
+        """
+            Restore charges, machines, schedule and objective values to their initial state without parsing the
+            instance again
+        """
+        self.charges.reset()
+        self.machines.reset()
+        self.schedule.reset()
         self.h = 0
+        self.__chromosome = None
         self.__initial_zeta = None
         self.__z1 = 0
         self.__z2 = 0
         self.__z3 = 0
 
-        self.gantt_data = {"Task": [], "Start": [], "Finish": [], "Complete": []}
+    def freeze(self, allocations=(), not_before=-np.inf, unavailable_until=None):
+        """
+            Keep allocations unchanged in the next decodes, e.g. the operations already started when rescheduling,
+            and schedule the other operations after them. Calling it again replaces the previous frozen
+            allocations.
+        Args:
+            allocations: list of (charge_index, stage, machine_index, starting_time, ending_time) to keep
+            not_before: float, time in minutes since the epoch before which no other operation starts
+            unavailable_until: dictionary of time in minutes since the epoch until which a machine is unavailable
+                for the other operations, indexed by machine index (optional)
+        """
+        self.__frozen_allocations = sorted(((int(charge), int(stage), int(machine), float(start), float(end)) for
+                                            charge, stage, machine, start, end in allocations),
+                                           key=lambda allocation: allocation[3])
 
-        self.instance_data = {'num_charges': len(self.charges.cast_plan),
-                              'num_machines': self.machines.num_machines,
-                              'num_stages': self.machines.last_stage}
+        self.__frozen_operations = np.zeros(self.schedule.num_operations, dtype=bool)
+        for charge, stage, _, _, _ in self.__frozen_allocations:
+            if self.charges.route_position[charge, stage] < 0:
+                raise ValueError(f"charge {charge} is not processed in stage {stage}")
+
+            self.__frozen_operations[self.schedule.operation(charge, stage)] = True
+
+        self.__machines_not_before = np.full(self.machines.num_machines, float(not_before))
+        for machine, time in (unavailable_until or {}).items():
+            self.__machines_not_before[machine] = max(self.__machines_not_before[machine], time)
+
+        # The recorded allocations depend on the state left by the frozen ones
+        self.__traces = {}
+        self.__adjusted_times = None
+
+    def decode(self, zeta=None, incremental=True):
+        """
+            Run the heuristic for a permutation of the charges processed in stage 1, reusing the parsed instance.
+
+            When decoding incrementally, the allocations of the previous decode are reused up to the first position
+            of each stage where the charge or its state differs, e.g. up to the first charge that changed in zeta
+            for stage 1: the state at that position is restored at once, and only the remaining allocations go
+            through the steps of the heuristic again.
+        Args:
+            zeta: list of int, permutation of the charges processed in stage 1 (random if None)
+            incremental: bool, whether to reuse the allocations of the previous decode
+
+        Returns:
+            (z1, z2, z3): tuple of objective values of the resulting schedule
+
+        """
+        if zeta is not None and sorted(zeta) != self.__charges_first_stage:
+            raise ValueError("zeta must be a permutation of the charges processed in stage 1")
+
+        self.__incremental = incremental
+        self.__computed_allocations = False
+        self.__step_1(zeta)
+        self.__run()
 
-        self.__step_2()
+        return self.__z1, self.__z2, self.__z3
+
+    def __step_1(self, zeta=None):
+        """
+            Initialize current earliest available time (tau_i) for each charge to 0
+            and current earliest available time (mu_m) for each machine to the
+            earliest available time (et_m). Set stage index (h=1).
+        """
+
+        self.reporter.step(self, 1)
+        self.reset()
+        self.__chromosome = zeta
+
+        for charge_index, stage, machine_index, starting_time, ending_time in self.__frozen_allocations:
+            self.charges.allocate(charge_index, machine_index, starting_time, ending_time)
+            self.machines.allocate(charge_index, machine_index, starting_time, ending_time)
+            self.schedule.allocate(charge_index, stage, machine_index, starting_time, ending_time)
+
+        if self.__machines_not_before is not None:
+            np.maximum(self.machines.current_earliest_available_time, self.__machines_not_before,
+                       out=self.machines.current_earliest_available_time)
+
+    def __run(self):
+        """
+            Run the heuristic as a loop over its steps. Each step returns the next step to be executed,
+            or None once the simulation ends, so the stack depth does not depend on the number of charges.
+        """
+        step = self.__step_2
+        while step is not None:
+            step = step()
 
     def __step_2(self):
         """
@@ -41,13 +241,13 @@ class Simulation:
            otherwise, go to Step 8.
        """
 
-        print("Step 2")
+        self.reporter.step(self, 2)
 
         if self.h < self.machines.last_stage:  # If h < H
-            self.__step_3()  # Go to step 3
+            return self.__step_3  # Go to step 3
 
         else:
-            self.__step_8()  # Go to stage 8
+            return self.__step_8  # Go to stage 8
 
     def __step_3(self):
         """
@@ -64,30 +264,45 @@ class Simulation:
                 Then, es_oi can be computed as follows: es_oi = min{s_oim}, m ∈ W_h.
            """
 
-        print("Step 3")
+        self.reporter.step(self, 3)
 
         if self.h == 0:  # Fist stage
-            self.__zeta = self.charges.in_stage(self.h)  # Get charges processed in stage h
-            shuffle(self.__zeta)  # Get a permutation of zeta
+            if self.__chromosome is None:
+                # Get a permutation of the charges processed in stage h
+                zeta = self.__rng.permutation(self.charges.in_stage(self.h)).tolist()
+
+            else:
+                zeta = list(self.__chromosome)
 
-            self.__initial_zeta = copy(self.__zeta)
+            self.__initial_zeta = copy(zeta)
+
+            if self.__frozen_allocations:
+                zeta = self.__unfrozen(np.array(zeta, dtype=int)).tolist()
 
         else:
-            self.__zeta = self.__generate_non_decreasing_sequence()
+            zeta = self.__generate_non_decreasing_sequence()
+
+        self.__zeta = deque(self.__start_trace(self.h, zeta))
 
-        self.__step_4()  # Go to step 4
+        # Machines of the stage ordered by current earliest available time mu_m, updated as they are allocated
+        self.__machine_heap = [(float(self.machines.current_earliest_available_time[machine]),
+                                self.__machine_position[machine], int(machine)) for machine in
+                               self.machines.in_stage(self.h)]
+        heapify(self.__machine_heap)
+
+        return self.__step_4  # Go to step 4
 
     def __step_4(self):
         """
             If zeta is empty, go to Step 7, otherwise, go to Step 5.
         """
-        print("Step 4")
+        self.reporter.step(self, 4)
 
         if not self.__zeta:  # If zeta is empty
-            self.__step_7()  # Go to step 7
+            return self.__step_7  # Go to step 7
 
         else:
-            self.__step_5()  # Go to step 5
+            return self.__step_5  # Go to step 5
 
     def __step_5(self):
         """
@@ -113,31 +328,31 @@ class Simulation:
                     The current earliest available time of charge zeta(1) should be updated by tau_zeta1 = e_ozeta_1
            """
 
-        print("Step 5")
+        self.reporter.step(self, 5)
 
         zeta1 = self.__zeta[0]  # Take the first charge zeta(1) from
 
         self.__allocate(zeta1)
 
-        self.__step_6()
+        return self.__step_6
 
     def __step_6(self):
         """
             Remove charge zeta(1) from set zeta, and go to Step 4.
         """
 
-        print("Step 6")
-        self.__zeta.pop(0)  # Remove zeta(1)
-        self.__step_4()
+        self.reporter.step(self, 6)
+        self.__zeta.popleft()  # Remove zeta(1)
+        return self.__step_4
 
     def __step_7(self):
         """
             h = h + 1, go to Step 2.
         """
-        print("Step 7")
+        self.reporter.step(self, 7)
 
         self.h += 1  # Update h
-        self.__step_2()  # Go to Step 2
+        return self.__step_2  # Go to Step 2
 
     def __step_8(self):
         """
@@ -156,10 +371,10 @@ class Simulation:
 
             where i ∈ psi_j, j ∈ omega_m.
             """
-        print("Step 8")
+        self.reporter.step(self, 8)
         self.__allocate_last_stage()
 
-        self.__step_9()
+        return self.__step_9
 
     def __step_9(self):
         """
@@ -169,67 +384,146 @@ class Simulation:
                 - e_Oi = s_oi1+1
                 - s_Oi = e_Oi - ct_mi_sta,
             where i ∈ {li(j)-1, ..., li(j-1)+2, li(j-1)+1}
+
+            With flexible casting, the casting times of the other charges may take any value within
+            [ct_mi_min, ct_mi_max] instead of ct_mi_sta, so they are cast as early as possible.
             """
-        print("Step 9")
+        self.reporter.step(self, 9)
+
+        # Every allocation is the same as in the previous decode, and so are the adjusted times
+        if self.__incremental and not self.__computed_allocations and self.__adjusted_times is not None:
+            self.schedule.starting_time[self.__last_stage_operations] = self.__adjusted_times[0]
+            self.schedule.ending_time[self.__last_stage_operations] = self.__adjusted_times[1]
+
+        else:
+            if self.flexible_casting:
+                self.__adjust_casts()
 
-        self.__adjust_casters()
+            else:
+                self.__adjust_casters()
 
-        self.__objective_functions()
+            self.__adjusted_times = (self.schedule.starting_time[self.__last_stage_operations],
+                                     self.schedule.ending_time[self.__last_stage_operations])
 
-        self.plot_gantt()
+        self.objective_functions(*self.lambdas)
 
-        print("End of simulation")
+        self.reporter.end(self)
 
     def __adjust_casters(self):
-        casters = [machine_index for machine_index, stage in self.machines.stage.items() if
-                   stage == self.machines.last_stage]
+        casters = self.machines.in_stage(self.machines.last_stage)
+
+        for caster in casters:
+            operations = self.__operations_to_adjust(caster)
+            for allocation_index in reversed(range(len(operations) - 1)):
+                operation = operations[allocation_index]
+                charge_id = self.schedule.operation_charge[operation]
+
+                ending_time = self.schedule.starting_time[operations[allocation_index + 1]]
+
+                casting_time = self.charges.process_time(charge_id, self.machines.last_stage)
+                starting_time = ending_time - casting_time
+
+                self.schedule.starting_time[operation] = starting_time
+                self.schedule.ending_time[operation] = ending_time
+
+    def __adjust_casts(self):
+        """
+            Adjust each cast keeping the times of its last charge, with the casting times within their windows.
+            Every other charge ends when the next charge of its cast starts, so the casting is continuous, and
+            starts as early as possible without starting before:
+                - its ready time, i.e. its ending time in the previous stage plus the transport time
+                - the starting time of the cast computed in Step 8, plus the minimum casting times of the charges
+                  cast before it in the cast
+            A first pass computes these lower bounds and a reverse pass the times, so each cast is adjusted in
+            linear time.
+        """
+        casters = self.machines.in_stage(self.machines.last_stage)
 
         for caster in casters:
-            last_allocation_index = len(self.machines.allocation[caster]['Allocation']) - 1
-            for allocation_index, charge_id in reversed(
-                    list(enumerate(self.machines.allocation[caster]['Allocation']))):
-                if allocation_index != last_allocation_index:
-                    ending_time = self.machines.allocation[caster]['StartingTime'][allocation_index + 1]
+            operations = self.__operations_to_adjust(caster)
+
+            cast_start = 0
+            for allocation_index, operation in enumerate(operations):
+                charge_id = self.schedule.operation_charge[operation]
+                last_of_cast = allocation_index + 1 == len(operations) or \
+                    self.charges.cast_plan[charge_id]["CastID"] != \
+                    self.charges.cast_plan[self.schedule.operation_charge[operations[allocation_index + 1]]]["CastID"]
+
+                if last_of_cast:
+                    self.__adjust_cast(caster, operations[cast_start:allocation_index + 1])
+                    cast_start = allocation_index + 1
+
+    def __adjust_cast(self, caster: int, operations: list):
+        """
+            Adjust the charges of a cast, in casting order, keeping the times of the last one
+        Args:
+            caster: int, index of the caster
+            operations: list of operations of the cast, in casting order
+        """
+        caster_stage = self.machines.last_stage
+
+        lower_bounds = []
+        lower_bound = -np.inf
+        for operation in operations[:-1]:
+            if operation > self.schedule.first_operation[self.schedule.operation_charge[operation]]:
+                previous_operation = operation - 1
+                ready_time = self.schedule.ending_time[previous_operation] + \
+                    self.machines.transport_time(self.schedule.machine[previous_operation], caster)
 
-                    casting_time = self.charges.cc_processing_time[charge_id]['StandardTime'] * 60
-                    starting_time = datetime.timestamp(ending_time) - casting_time
-                    starting_time = datetime.fromtimestamp(starting_time, pytz.utc)
+            else:
+                ready_time = -np.inf
 
-                    self.machines.allocation[caster]['StartingTime'][allocation_index] = None
-                    self.machines.allocation[caster]['StartingTime'][allocation_index] = starting_time
+            if not lower_bounds:
+                # The cast cannot start before the time computed in Step 8, the end of the previous cast
+                ready_time = self.schedule.starting_time[operation]
 
-                    self.machines.allocation[caster]['EndingTime'][allocation_index] = None
-                    self.machines.allocation[caster]['EndingTime'][allocation_index] = ending_time
+            lower_bound = max(lower_bound, ready_time)
+            lower_bounds.append(lower_bound)
 
-                    index = self.charges.allocation[charge_id]["Allocation"].index(caster)
+            charge_id = self.schedule.operation_charge[operation]
+            lower_bound += self.charges.processing_times[PROCESSING_TIME_TYPES["MinTime"], charge_id, caster_stage]
 
-                    self.charges.allocation[charge_id]["StartingTime"][index] = None
-                    self.charges.allocation[charge_id]["StartingTime"][index] = starting_time
+        for allocation_index in reversed(range(len(operations) - 1)):
+            operation = operations[allocation_index]
+            charge_id = self.schedule.operation_charge[operation]
 
-                    self.charges.allocation[charge_id]["EndingTime"][index] = None
-                    self.charges.allocation[charge_id]["EndingTime"][index] = ending_time
+            ending_time = self.schedule.starting_time[operations[allocation_index + 1]]
+            starting_time = max(lower_bounds[allocation_index],
+                                ending_time - self.charges.processing_times[PROCESSING_TIME_TYPES["MaxTime"], charge_id,
+                                                                            caster_stage])
+
+            self.schedule.starting_time[operation] = starting_time
+            self.schedule.ending_time[operation] = ending_time
 
     def __allocate_last_stage(self):
         for cc_machine in self.charges.cc_processing_time["Charge_Sequences"].keys():
-            for charge_index in self.charges.cc_processing_time["Charge_Sequences"][cc_machine]:
+            sequence = self.charges.cc_processing_time["Charge_Sequences"][cc_machine]
+            if self.__frozen_allocations:
+                sequence = self.__unfrozen(np.array(sequence, dtype=int), self.machines.last_stage).tolist()
+
+            for charge_index in self.__start_trace((self.machines.last_stage, cc_machine), sequence):
                 previous_machine = self.charges.previous_machine[charge_index]
+                charge_ceat = self.charges.current_earliest_available_time[charge_index]
 
                 machine_ceat = self.machines.current_earliest_available_time[cc_machine]
 
                 machine_tt = self.machines.transport_time(previous_machine, cc_machine)
-                charge_ceat = self.charges.current_earliest_available_time[charge_index]
-                charge_ceat_and_tt = datetime.timestamp(charge_ceat) + machine_tt * 60
-                charge_ceat_and_tt = datetime.fromtimestamp(charge_ceat_and_tt, pytz.utc)
+                charge_ceat_and_tt = charge_ceat + machine_tt
+
+                starting_time = float(max(machine_ceat, charge_ceat_and_tt))
 
-                starting_time = max(machine_ceat, charge_ceat_and_tt)
+                process_time = self.charges.process_time(charge_index, self.machines.last_stage)
 
-                process_time = self.charges.cc_processing_time[charge_index]["StandardTime"]
+                ending_time = starting_time + process_time
 
-                ending_time = datetime.timestamp(starting_time) + process_time * 60
-                ending_time = datetime.fromtimestamp(ending_time, pytz.utc)
+                self.__record_allocation(charge_index, charge_ceat, previous_machine, cc_machine, starting_time,
+                                         ending_time)
 
                 self.charges.allocate(charge_index, cc_machine, starting_time, ending_time)
                 self.machines.allocate(charge_index, cc_machine, starting_time, ending_time)
+                self.schedule.allocate(charge_index, self.machines.last_stage, cc_machine, starting_time, ending_time)
+
+        self.__finish_trace()
 
     def __allocate(self, charge_index, pt_type: str = "StandardTime"):
         """
@@ -238,67 +532,257 @@ class Simulation:
             charge_index: int, index of charge to allocate
             pt_type: string, "MaxTime", "MinTime" or "StandardTime" (default)
         """
-        machines_in_stage = self.machines.in_stage(self.h)
-
-        machines_ceat = {}
-        machines_tt = {}
-        availability = {}
         previous_machine = self.charges.previous_machine[charge_index]
         charge_ceat = self.charges.current_earliest_available_time[charge_index]
 
-        for machine_index in machines_in_stage:
-            machines_ceat[machine_index] = self.machines.current_earliest_available_time[machine_index]
-            machines_tt[machine_index] = self.machines.transport_time(previous_machine, machine_index)
+        earliest_machine_available, starting_time = self.__earliest_machine(charge_index, charge_ceat,
+                                                                            previous_machine)
 
-            charge_ceat_and_tt = datetime.timestamp(charge_ceat) + machines_tt[machine_index] * 60
+        process_time = self.charges.processing_times[PROCESSING_TIME_TYPES[pt_type], charge_index, self.h]
 
-            charge_ceat_and_tt = datetime.fromtimestamp(charge_ceat_and_tt, pytz.utc)
-            availability[machine_index] = max(charge_ceat_and_tt, machines_ceat[machine_index])
+        ending_time = starting_time + process_time
 
-        earliest_machine_available = min(availability, key=availability.get)
+        self.__record_allocation(charge_index, charge_ceat, previous_machine, earliest_machine_available,
+                                 starting_time, ending_time)
 
-        starting_time = availability[earliest_machine_available]
+        self.charges.allocate(charge_index, earliest_machine_available, starting_time, ending_time)
+        self.machines.allocate(charge_index, earliest_machine_available, starting_time, ending_time)
+        self.schedule.allocate(charge_index, self.h, earliest_machine_available, starting_time, ending_time)
 
-        process_time = self.charges.process_time(charge_index, self.h, pt_type)
+        heappush(self.__machine_heap, (float(ending_time), self.__machine_position[earliest_machine_available],
+                                       earliest_machine_available))
 
-        ending_time = datetime.timestamp(starting_time) + process_time * 60
-        ending_time = datetime.fromtimestamp(ending_time, pytz.utc)
+    def __earliest_machine(self, charge_index, charge_ceat, previous_machine):
+        """
+            Find the machine of stage h with the earliest starting time max{mu_m, tau_i + tt_m'm} for a charge.
 
-        self.charges.allocate(charge_index, earliest_machine_available, starting_time, ending_time)
-        self.charges.previous_machine[charge_index] = earliest_machine_available
+            Machines are taken from the heap in non-decreasing order of mu_m, which is a lower bound of their
+            starting time, until mu_m exceeds the earliest starting time found, so only the machines that may
+            start the charge first are evaluated. Entries of the heap whose mu_m is outdated are dropped, the
+            others are pushed back. Ties are broken as in the whole-stage scan: by tie-break priority, or by
+            position in the stage.
+        Args:
+            charge_index: int, index of charge to allocate
+            charge_ceat: float, current earliest available time of the charge (tau_i)
+            previous_machine: int, machine previously assigned to the charge (-1 if none)
 
-        self.machines.allocate(charge_index, earliest_machine_available, starting_time, ending_time)
+        Returns:
+            (machine_index, starting_time): earliest machine and starting time of the charge on it
+        """
+        heap = self.__machine_heap
+        transport_times = self.__transport_times[previous_machine]
+        machines_ceat = self.machines.current_earliest_available_time
+
+        earliest_starting_time = np.inf
+        earliest_machines = []
+        evaluated = []
+        while heap and heap[0][0] <= earliest_starting_time:
+            entry = heappop(heap)
+            machine_ceat, position, machine = entry
+            if machine_ceat != machines_ceat[machine] or any(machine == other[2] for other in evaluated):
+                continue
+
+            evaluated.append(entry)
+
+            starting_time = max(machine_ceat, charge_ceat + transport_times[machine])
+            if starting_time < earliest_starting_time:
+                earliest_starting_time = starting_time
+                earliest_machines = [(position, machine)]
+
+            elif starting_time == earliest_starting_time:
+                earliest_machines.append((position, machine))
+
+        for entry in evaluated:
+            heappush(heap, entry)
+
+        if len(earliest_machines) > 1 and self.__tie_break_priority is not None:
+            _, earliest_machine = min(earliest_machines, key=lambda candidate: self.__tie_break_priority[
+                charge_index, candidate[1]])
+
+        else:
+            _, earliest_machine = min(earliest_machines)
+
+        return earliest_machine, float(earliest_starting_time)
+
+    def __start_trace(self, key, sequence):
+        """
+            Start recording the allocations of a stage, or of a caster in the last stage, and restore the state
+            reached by the previous decode at the first position that must be computed again.
+
+            An allocation only depends on the previous allocations of the same stage (or caster) and on the current
+            earliest available time and previous machine of the charge, which do not change during the stage. So,
+            when decoding incrementally, the allocations recorded for the same key in the previous decode are valid
+            up to the first charge that differs from the recorded one or whose state differs. They are applied at
+            once to the charges, machines and schedule, without going through the steps of the heuristic.
+        Args:
+            key: stage h, or tuple (H, caster) in the last stage
+            sequence: list of int, charges to allocate, in order
+
+        Returns:
+            sequence: list of int, charges left to allocate, in order
+        """
+        self.__finish_trace()
+
+        sequence = np.asarray(sequence, dtype=int)
+        replayed = self.__replay_trace(key, sequence)
+
+        return sequence[replayed:].tolist()
+
+    def __replay_trace(self, key, sequence):
+        """
+            Apply the allocations recorded for a key in the previous decode that are still valid
+        Args:
+            key: stage h, or tuple (H, caster) in the last stage
+            sequence: array of int, charges to allocate, in order
+
+        Returns:
+            replayed: int, number of allocations applied
+        """
+        previous_trace = self.__traces.pop(key, None) if self.__incremental else None
+        self.__trace_key = key
+        self.__trace_prefix = None
+        self.__trace = []
+
+        if previous_trace is None:
+            return 0
+
+        charges, charges_ceat, previous_machines, machines, starting_times, ending_times = previous_trace
+        length = min(len(charges), len(sequence))
+        prefix = sequence[:length]
+
+        valid = (charges[:length] == prefix) & \
+                (charges_ceat[:length] == self.charges.current_earliest_available_time[prefix]) & \
+                (previous_machines[:length] == self.charges.previous_machine[prefix])
+        replayed = length if valid.all() else int(valid.argmin())
+
+        if replayed:
+            self.__trace_prefix = tuple(column[:replayed] for column in previous_trace)
+            stage = key if isinstance(key, int) else key[0]
+
+            self.charges.allocate(prefix[:replayed], machines[:replayed], starting_times[:replayed],
+                                  ending_times[:replayed])
+            self.machines.allocate_sequence(machines[:replayed], ending_times[:replayed])
+            self.schedule.allocate_sequence(prefix[:replayed], stage, machines[:replayed], starting_times[:replayed],
+                                            ending_times[:replayed])
+
+        return replayed
+
+    def __finish_trace(self):
+        """
+            Keep the allocations of the current key, reused and computed, for the next decode
+        """
+        if self.__trace_key is None:
+            return
+
+        if self.__trace:
+            self.__computed_allocations = True
+
+            computed = np.array(self.__trace, dtype=float)
+            columns = (computed[:, 0].astype(int), computed[:, 1], computed[:, 2].astype(int),
+                       computed[:, 3].astype(int), computed[:, 4], computed[:, 5])
+            if self.__trace_prefix is not None:
+                columns = tuple(np.concatenate((prefix, column)) for prefix, column in
+                                zip(self.__trace_prefix, columns))
+
+        else:
+            columns = self.__trace_prefix if self.__trace_prefix is not None else \
+                (np.empty(0, dtype=int), np.empty(0), np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0),
+                 np.empty(0))
+
+        self.__traces[self.__trace_key] = columns
+        self.__trace_key = None
+        self.__trace_prefix = None
+        self.__trace = []
+
+    def __record_allocation(self, charge_index, charge_ceat, previous_machine, machine_index, starting_time,
+                            ending_time):
+        """
+            Record a computed allocation, to be reused by the next decode
+        """
+        self.__trace.append((charge_index, float(charge_ceat), int(previous_machine), machine_index, starting_time,
+                             ending_time))
 
     def __generate_non_decreasing_sequence(self):
+        """
+            Sort the charges processed in stage h by their earliest starting time es_oi = min{s_oim}, m ∈ W_h,
+            where s_oim = max{mu_m, tau_i + tt_m'm} is computed for all the charges and machines of the stage at once
+        Returns:
+            zeta: list of int, charges processed in stage h in non-decreasing order of es_oi
 
+        """
         charges_in_stage = self.charges.in_stage(self.h)
+        if self.__frozen_allocations:
+            charges_in_stage = self.__unfrozen(charges_in_stage)
 
         machines_in_stage = self.machines.in_stage(self.h)
 
-        starting_times = {}
-        eat_charges = {}
-        for charge in charges_in_stage:
-            starting_times[charge] = {}
-            charge_ceat = self.charges.current_earliest_available_time[charge]
-            previous_machine = self.charges.previous_machine[charge]
-            for machine in machines_in_stage:
-                machine_ceat = self.machines.current_earliest_available_time[machine]
-                machine_tt = self.machines.transport_time(previous_machine, machine)
+        charges_ceat = self.charges.current_earliest_available_time[charges_in_stage]
+        previous_machines = self.charges.previous_machine[charges_in_stage]
+        machines_ceat = self.machines.current_earliest_available_time[machines_in_stage]
+
+        machines_tt = self.machines.transport_times[np.ix_(previous_machines, machines_in_stage)]
+
+        starting_times = np.maximum(charges_ceat[:, np.newaxis] + machines_tt, machines_ceat[np.newaxis, :])
+        eat_charges = starting_times.min(axis=1)
+
+        return charges_in_stage[np.argsort(eat_charges, kind="stable")].tolist()
+
+    def __unfrozen(self, charges, stage=None):
+        """
+            Filter out the charges whose operation in a stage is frozen
+        Args:
+            charges: array of int, indexes of charges processed in the stage
+            stage: int, stage (h by default)
 
-                charge_ceat_tt = datetime.timestamp(charge_ceat) + machine_tt * 60
-                charge_ceat_tt = datetime.fromtimestamp(charge_ceat_tt, pytz.utc)
+        Returns:
+            charges: array of int, indexes of the charges whose operation in the stage is not frozen, in order
+        """
+        stage = self.h if stage is None else stage
+        operations = self.schedule.first_operation[charges] + self.charges.route_position[charges, stage]
 
-                starting_times[charge][machine] = max(charge_ceat_tt, machine_ceat)
+        return charges[~self.__frozen_operations[operations]]
 
-            eat_charges[charge] = starting_times[charge][min(starting_times[charge], key=starting_times[charge].get)]
+    def __operations_to_adjust(self, caster):
+        """
+            Get the operations allocated to a caster that Step 9 may adjust, i.e. the ones not frozen
+        """
+        operations = self.schedule.machine_operations[caster]
+        if self.__frozen_allocations:
+            operations = [operation for operation in operations if not self.__frozen_operations[operation]]
 
-        return sorted(eat_charges, key=eat_charges.__getitem__)
+        return operations
 
     @property
     def initial_zeta(self):
         return self.__initial_zeta
 
-    def __objective_functions(self, lambda1=1, lambda2=1, lambda3=1):
+    @property
+    def tie_break_priority(self):
+        """
+            Random priority of each machine for each charge used to break ties, None unless tie_break is "random"
+        Returns:
+            tie_break_priority: read-only array of shape (number of charges, number of machines), or None
+        """
+        if self.__tie_break_priority is None:
+            return None
+
+        tie_break_priority = self.__tie_break_priority.view()
+        tie_break_priority.setflags(write=False)
+
+        return tie_break_priority
+
+    def objective_functions(self, lambda1=1, lambda2=1, lambda3=1):
+        """
+            Compute the weighted objectives of the current schedule
+        Args:
+            lambda1: float, weight of the makespan (z1)
+            lambda2: float, weight of the waiting time between consecutive operations of the charges (z2)
+            lambda3: float, weight of the deviation from the standard processing times (z3)
+
+        Returns:
+            (z1, z2, z3): tuple of objective values
+
+        """
 
         self.__calculate_penalty_makespan(lambda1)
 
@@ -306,6 +790,8 @@ class Simulation:
 
         self.__calculate_penalty_deviation_std_processing_time(lambda3)
 
+        return self.__z1, self.__z2, self.__z3
+
     @property
     def z1(self):
         return self.__z1
@@ -319,62 +805,50 @@ class Simulation:
         return self.__z3
 
     def __calculate_penalty_makespan(self, lambda1):
-        last_stage = self.machines.last_stage
-        last_machines = self.machines.in_stage(last_stage)
-        ending_times = [self.machines.allocation[machine]['EndingTime'][-1] for machine in last_machines]
-        self.__z1 = lambda1 * datetime.timestamp(max(ending_times))
+        ending_times = self.schedule.ending_time[self.__last_stage_operations]
+        self.__z1 = lambda1 * self.machines.to_timestamp(float(ending_times.max()))
 
     def __calculate_penalty_waiting_time(self, lambda2):
-        z2 = 0
-        for charge, allocation in self.charges.allocation.items():
-            last_position = len(allocation['Allocation']) - 1
-            for position, machine in enumerate(allocation['Allocation']):
-                if position != last_position:
-                    next_machine = self.charges.allocation[charge]["Allocation"][position + 1]
-                    starting_time_next = datetime.timestamp(allocation["StartingTime"][position + 1])
-                    ending_time_current = datetime.timestamp(allocation["EndingTime"][position])
-                    transport_time = self.machines.transport_time(machine, next_machine) * 60
+        operations = self.__operations_with_next
+        next_operations = operations + 1
 
-                    penalty = starting_time_next - ending_time_current - transport_time
+        starting_time_next = self.schedule.starting_time[next_operations] * 60
+        ending_time_current = self.schedule.ending_time[operations] * 60
+        transport_time = self.machines.transport_times[self.schedule.machine[operations],
+                                                       self.schedule.machine[next_operations]] * 60
 
-                    z2 += penalty
+        penalty = starting_time_next - ending_time_current - transport_time
 
-        self.__z2 = lambda2 * z2
+        self.__z2 = lambda2 * float(penalty.sum())
 
     def __calculate_penalty_deviation_std_processing_time(self, lambda3):
-        z3 = 0
-        for charge, allocation in self.charges.allocation.items():
-            last_position = len(allocation['Allocation']) - 1
-            for position, machine in enumerate(allocation['Allocation']):
-                starting_time = datetime.timestamp(allocation["StartingTime"][position])
-                ending_time = datetime.timestamp(allocation["EndingTime"][position])
-                stage = self.charges.cast_plan[charge]['ChargeRoute'][position]
-
-                if position != last_position:
-                    process_time = self.charges.process_time(charge, stage, "StandardTime") * 60
+        processing_time = (self.schedule.ending_time - self.schedule.starting_time) * 60
+        penalty = np.abs(processing_time - self.__standard_process_time * 60)
 
-                else:
-                    process_time = self.charges.cc_processing_time[charge]['StandardTime'] * 60
+        self.__z3 = lambda3 * float(penalty.sum())
 
-                penalty = max(0, ending_time - starting_time - process_time) - \
-                          min(0, ending_time - starting_time - process_time)
+    def gantt_dataframe(self):
+        """
+            Build the Gantt chart data of the current schedule, one row per operation
+        Returns:
+            gantt_df: pandas DataFrame with columns Task (machine), Start, Finish and Complete (duration in minutes)
 
-                z3 += penalty
+        """
+        import pandas as pd
 
-        self.__z3 = lambda3 * z3
+        self.gantt_data = {"Task": [], "Start": [], "Finish": [], "Complete": []}
 
-    def plot_gantt(self):
-        for charge, allocation in self.charges.allocation.items():
-            for position, machine in enumerate(allocation['Allocation']):
-                self.gantt_data["Task"].append(machine)
+        for operation in range(self.schedule.num_operations):
+            if self.schedule.machine[operation] >= 0:
+                self.gantt_data["Task"].append(int(self.schedule.machine[operation]))
 
-                start = self.charges.allocation[charge]['StartingTime'][position]
-                self.gantt_data["Start"].append(start)
+                start = self.schedule.starting_time[operation]
+                self.gantt_data["Start"].append(self.machines.to_datetime(start))
 
-                end = self.charges.allocation[charge]['EndingTime'][position]
-                self.gantt_data["Finish"].append(end)
+                end = self.schedule.ending_time[operation]
+                self.gantt_data["Finish"].append(self.machines.to_datetime(end))
 
-                duration_minutes = (datetime.timestamp(end) - datetime.timestamp(start)) / 60
+                duration_minutes = end - start
                 self.gantt_data["Complete"].append(int(duration_minutes))
 
         gantt_df = pd.DataFrame(self.gantt_data["Task"], columns=['Task'])
@@ -387,6 +861,25 @@ class Simulation:
         gantt_df["Task"] = gantt_df["Task"].apply(lambda x: f"Machine {x}")
         gantt_df.reset_index(drop=True, inplace=True)
 
+        return gantt_df
+
+    def plot_gantt(self, show=True):
+        """
+            Build the Gantt chart of the current schedule
+        Args:
+            show: bool, whether to show the figure
+
+        Returns:
+            fig: plotly figure of the Gantt chart
+
+        """
+        import plotly.figure_factory as ff
+
+        gantt_df = self.gantt_dataframe()
+
         fig = ff.create_gantt(gantt_df, bar_width=0.4, showgrid_y=True, height=800, colors="Reds", index_col='Complete',
                               show_colorbar=True, group_tasks=True, title=f"Gantt chart - {self.name}")
-        fig.show()
+        if show:
+            fig.show()
+
+        return fig
@@ -0,0 +1,20 @@
+import pandas as pd
+
+from src.continuous_casting.benchmark import compare_results, run_benchmarks, scale_instance
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import get_instances
+
+instances = get_instances()
+
+scaled_inst_02 = scale_instance(instances["Instance_02"], 3)
+scaled_objectives_inst_02 = Simulation(scaled_inst_02, name="Instance 02 x3", run=False, headless=True,
+                                       seed=1).decode()
+
+# Instances given as DataFrames are scaled the same way
+scaled_frames_inst_02 = scale_instance({table: pd.DataFrame(instances["Instance_02"][table]) for table in
+                                        instances["Instance_02"]}, 3)
+assert Simulation(scaled_frames_inst_02, name="Instance 02 x3", run=False, headless=True,
+                  seed=1).decode() == scaled_objectives_inst_02
+
+benchmark_results = run_benchmarks(names=["Instance_02"], decodes=3, scales=(2,))
+benchmark_regressions = compare_results(benchmark_results, benchmark_results)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+import pandas as pd
+
+from src.continuous_casting.cache import ENTRY_OVERHEAD, FitnessCache, instance_fingerprint
+from src.continuous_casting.genetic_algorithm import GeneticAlgorithm
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import get_instances
+
+instances = get_instances()
+
+cached_inst_01 = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True, seed=1)
+settings_inst_01 = FitnessCache.settings_of(cached_inst_01)
+zeta_inst_01 = cached_inst_01.charges.in_stage(0).tolist()
+objectives_inst_01 = cached_inst_01.decode(zeta_inst_01)
+
+# Least recently used entries are evicted once over the memory bound
+cache_inst_01 = FitnessCache(instances["Instance_01"], settings_inst_01, max_memory=2 * ENTRY_OVERHEAD)
+cache_inst_01.put(zeta_inst_01, objectives_inst_01)
+cache_inst_01.put(zeta_inst_01[::-1], objectives_inst_01)
+cache_inst_01.get(zeta_inst_01)
+cache_inst_01.put(zeta_inst_01[1:] + zeta_inst_01[:1], objectives_inst_01)
+assert cache_inst_01.get(zeta_inst_01[::-1]) is None and cache_inst_01.get(zeta_inst_01) is not None
+assert cache_inst_01.evictions == 1 and cache_inst_01.hits == 2 and cache_inst_01.misses == 1
+
+# The shelf survives the cache, and the settings are part of the key
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "fitness")
+    with FitnessCache(instances["Instance_01"], settings_inst_01, store_schedules=True, path=path) as cache:
+        cache.put(zeta_inst_01, objectives_inst_01, cached_inst_01.schedule)
+
+    with FitnessCache(instances["Instance_01"], settings_inst_01, path=path) as cache:
+        stored_objectives_inst_01, stored_schedule_inst_01 = cache.get(zeta_inst_01)
+        assert cache.disk_hits == 1
+
+    with FitnessCache(instances["Instance_01"], ((2, 1, 1),) + settings_inst_01[1:], path=path) as cache:
+        assert cache.get(zeta_inst_01) is None
+
+assert stored_objectives_inst_01 == tuple(float(value) for value in objectives_inst_01)
+assert (stored_schedule_inst_01[2] == cached_inst_01.schedule.ending_time).all()
+
+# Unseeded simulations draw their own tie-breaks, so they never share entries
+unseeded_settings_inst_01 = [FitnessCache.settings_of(Simulation(instances["Instance_01"], name="Instance 01",
+                                                                 run=False, headless=True)) for _ in range(2)]
+assert unseeded_settings_inst_01[0] != unseeded_settings_inst_01[1]
+
+# Instances given as DataFrames are cached the same way
+frames_inst_02 = {table: pd.DataFrame(instances["Instance_02"][table]) for table in instances["Instance_02"]}
+assert instance_fingerprint(frames_inst_02) == instance_fingerprint(frames_inst_02.copy())
+frames_best_zeta_inst_02, _ = GeneticAlgorithm(frames_inst_02, population_size=4, max_generations=2, seed=1).run()
@@ -0,0 +1,20 @@
+from random import sample
+
+from src.continuous_casting.evaluation import evaluate_population
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import get_instances
+
+if __name__ == "__main__":
+    instances = get_instances()
+
+    charges_first_stage_inst_01 = Simulation(instances["Instance_01"], name="Instance 01",
+                                             run=False).charges.in_stage(0).tolist()
+
+    population_inst_01 = [sample(charges_first_stage_inst_01, len(charges_first_stage_inst_01)) for _ in range(16)]
+
+    serial_objectives_inst_01 = evaluate_population(instances["Instance_01"], population_inst_01, workers=1,
+                                                    seed=1)
+    parallel_objectives_inst_01 = evaluate_population(instances["Instance_01"], population_inst_01, workers=4,
+                                                      seed=1)
+
+    assert (serial_objectives_inst_01 == parallel_objectives_inst_01).all()
@@ -0,0 +1,26 @@
+import csv
+import json
+import os
+import tempfile
+
+from src.continuous_casting.export import export_schedule
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import get_instances
+
+instances = get_instances()
+
+exported_inst_01 = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True, seed=1)
+exported_objectives_inst_01 = exported_inst_01.decode()
+
+with tempfile.TemporaryDirectory() as directory:
+    export_schedule(exported_inst_01, os.path.join(directory, "schedule.csv"), chunk_size=100)
+    export_schedule(exported_inst_01, os.path.join(directory, "schedule.jsonl"), chunk_size=100)
+
+    with open(os.path.join(directory, "schedule.csv"), newline="") as file:
+        csv_rows_inst_01 = list(csv.DictReader(file))
+
+    with open(os.path.join(directory, "schedule.jsonl")) as file:
+        json_rows_inst_01 = [json.loads(line) for line in file]
+
+assert len(csv_rows_inst_01) == len(json_rows_inst_01) == exported_inst_01.schedule.num_operations
+assert sum(row["waiting"] for row in json_rows_inst_01) * 60 == exported_objectives_inst_01[1]
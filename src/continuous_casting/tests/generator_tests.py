@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+from src.continuous_casting.generator import generate_instance
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import get_instances
+
+with tempfile.TemporaryDirectory() as directory:
+    generate_instance(os.path.join(directory, "Synthetic_01"), num_charges=300, num_casts=30, num_stages=5,
+                      machines_per_stage=[4, 3, 3, 2], num_casters=3, seed=1)
+
+    synthetic_instances = get_instances(directory)
+    synthetic_simulation = Simulation(synthetic_instances["Synthetic_01"], name="Synthetic 01", run=False,
+                                      headless=True, seed=1)
+    synthetic_objectives = synthetic_simulation.decode()
+
+    assert synthetic_simulation.instance_data == {"num_charges": 300, "num_machines": 15, "num_stages": 4}
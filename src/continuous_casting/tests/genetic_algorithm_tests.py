@@ -0,0 +1,16 @@
+from src.continuous_casting.genetic_algorithm import GeneticAlgorithm
+from src.continuous_casting.utils import get_instances
+
+instances = get_instances()
+
+genetic_algorithm_inst_02 = GeneticAlgorithm(instances["Instance_02"], population_size=20, max_generations=10,
+                                             patience=5, seed=1)
+best_zeta_inst_02, best_objectives_inst_02 = genetic_algorithm_inst_02.run()
+
+history_inst_02 = genetic_algorithm_inst_02.history
+
+pareto_front_inst_02 = genetic_algorithm_inst_02.archive.objectives
+assert sum(genetic_algorithm_inst_02.archive.best()[0]) == sum(best_objectives_inst_02)
+
+cache_statistics_inst_02 = genetic_algorithm_inst_02.fitness_cache.statistics()
+assert cache_statistics_inst_02["misses"] == genetic_algorithm_inst_02.fitness_cache.misses > 0
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+from src.continuous_casting.generator import generate_instance
+from src.continuous_casting.local_search import LocalSearch
+from src.continuous_casting.utils import get_instances
+
+instances = get_instances()
+
+first_improvement_inst_02 = LocalSearch(instances["Instance_02"], strategy="first", max_iterations=20, seed=1)
+first_zeta_inst_02, first_objectives_inst_02 = first_improvement_inst_02.run()
+
+best_improvement_inst_02 = LocalSearch(instances["Instance_02"], neighborhoods=("swap", "block"), strategy="best",
+                                       time_limit=2, seed=1)
+best_zeta_inst_02, best_objectives_inst_02 = best_improvement_inst_02.run(first_zeta_inst_02)
+
+assert sum(best_objectives_inst_02) <= sum(first_objectives_inst_02)
+assert LocalSearch.apply_move([1, 2, 3, 4, 5], ("block", 0, 2, 3)) == [3, 4, 5, 1, 2]
+assert LocalSearch.apply_move([1, 2, 3, 4, 5], ("insert", 4, 1, 0)) == [5, 1, 2, 3, 4]
+
+# On a tiny instance every neighbor is soon visited, the search stops within its budget
+with tempfile.TemporaryDirectory() as directory:
+    generate_instance(os.path.join(directory, "Tiny"), 4, 1, num_stages=2, machines_per_stage=2, num_casters=1,
+                      skip_probability=0, seed=1)
+    tiny_search = LocalSearch(get_instances(directory)["Tiny"], max_iterations=5, seed=1)
+    tiny_search.run()
+
+assert tiny_search.iterations <= 5
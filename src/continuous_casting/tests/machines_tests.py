@@ -12,3 +12,14 @@ last_stage_inst_01 = machines_inst_01.last_stage
 
 ceat_inst_01 = machines_inst_01.current_earliest_available_time
 transport_time_inst_01 = machines_inst_01.transport_time
+
+# Machine 0 is a previous machine like any other, only -1 stands for no previous machine
+transport_lines_inst_01 = instances["Instance_01"]["Transport_Time"]
+for transport_line, transport_time in zip(transport_lines_inst_01["Transport_line"],
+                                          transport_lines_inst_01["Transport_Time"]):
+    previous_machine, next_machine = (int(machine) for machine in transport_line.split("-"))
+    if previous_machine == 0:
+        assert transport_time_inst_01(previous_machine, next_machine) == transport_time
+
+assert machines_inst_01.transport_times[0].max() > 0
+assert (machines_inst_01.transport_times[-1] == 0).all()
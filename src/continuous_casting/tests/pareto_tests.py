@@ -0,0 +1,15 @@
+import numpy as np
+
+from src.continuous_casting.pareto import ParetoArchive
+
+rng = np.random.default_rng(1)
+candidates = rng.integers(0, 20, size=(500, 3)).astype(float)
+
+archive = ParetoArchive()
+archive.update((objectives, index) for index, objectives in enumerate(candidates))
+
+# Same front as comparing every pair of candidates
+non_dominated = {tuple(objectives) for objectives in candidates.tolist() if
+                 not np.any(np.all(candidates <= objectives, axis=1) & np.any(candidates < objectives, axis=1))}
+assert set(map(tuple, archive.objectives.tolist())) == non_dominated
+assert all(tuple(candidates[index]) == objectives for objectives, index in archive)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from src.continuous_casting.rescheduling import ScheduleChange, reschedule
+from src.continuous_casting.simulation import Simulation
+from src.continuous_casting.utils import get_instances
+
+instances = get_instances()
+
+committed_inst_01 = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True, seed=1)
+committed_objectives_inst_01 = committed_inst_01.decode()
+
+now_inst_01 = float(np.nanmedian(committed_inst_01.schedule.starting_time))
+not_started_inst_01 = [charge for charge in committed_inst_01.charges.cast_plan if
+                       committed_inst_01.schedule.starting_time[committed_inst_01.schedule.first_operation[charge]] >=
+                       now_inst_01]
+
+urgent_charge = {"CC": 26, "CastID": 99, "ChargeRoute": [0, 1, 2, 3, 6],
+                 "ProcessingTime": {0: {"MinTime": 20, "StandardTime": 25, "MaxTime": 30},
+                                    1: {"MinTime": 20, "StandardTime": 25, "MaxTime": 30},
+                                    2: {"MinTime": 20, "StandardTime": 25, "MaxTime": 30},
+                                    3: {"MinTime": 20, "StandardTime": 25, "MaxTime": 30},
+                                    6: {"MinTime": 50, "StandardTime": 55, "MaxTime": 60}}}
+
+change_inst_01 = ScheduleChange(unavailable_until={5: now_inst_01 + 300}, new_charges={200: urgent_charge},
+                                removed_charges=not_started_inst_01[:1],
+                                processing_times={(not_started_inst_01[1], 6): {"StandardTime": 70, "MaxTime": 80}})
+
+rescheduled_inst_01 = reschedule(committed_inst_01, now_inst_01, change_inst_01)
+rescheduled_objectives_inst_01 = (rescheduled_inst_01.z1, rescheduled_inst_01.z2, rescheduled_inst_01.z3)
+
+# Operations started before the rescheduling are kept
+for operation in np.flatnonzero(committed_inst_01.schedule.starting_time < now_inst_01):
+    charge = committed_inst_01.schedule.operation_charge[operation]
+    stage = committed_inst_01.schedule.operation_stage[operation]
+    rescheduled_operation = rescheduled_inst_01.schedule.operation(charge, stage)
+
+    assert rescheduled_inst_01.schedule.starting_time[rescheduled_operation] == \
+        committed_inst_01.schedule.starting_time[operation]
+
+# The other operations start after the rescheduling, and after the unavailability of their machine
+rescheduled_schedule_inst_01 = rescheduled_inst_01.schedule
+frozen_inst_01 = {(committed_inst_01.schedule.operation_charge[operation],
+                   committed_inst_01.schedule.operation_stage[operation]) for operation in
+                  np.flatnonzero(committed_inst_01.schedule.starting_time < now_inst_01)}
+for operation in range(rescheduled_schedule_inst_01.num_operations):
+    if (rescheduled_schedule_inst_01.operation_charge[operation],
+            rescheduled_schedule_inst_01.operation_stage[operation]) not in frozen_inst_01:
+        assert rescheduled_schedule_inst_01.starting_time[operation] >= now_inst_01
+
+        if rescheduled_schedule_inst_01.machine[operation] == 5:
+            assert rescheduled_schedule_inst_01.starting_time[operation] >= now_inst_01 + 300
+
+# The new charge is scheduled on its whole route, and the removed charge is gone
+urgent_operations_inst_01 = rescheduled_schedule_inst_01.charge_operations(200)
+assert len(urgent_operations_inst_01) == len(urgent_charge["ChargeRoute"])
+assert (rescheduled_schedule_inst_01.machine[urgent_operations_inst_01] >= 0).all()
+assert not np.isnan(rescheduled_schedule_inst_01.ending_time[urgent_operations_inst_01]).any()
+assert not_started_inst_01[0] not in rescheduled_inst_01.charges.cast_plan
+assert not_started_inst_01[0] not in rescheduled_schedule_inst_01.operation_charge
+
+# Instances given as DataFrames are rescheduled the same way
+committed_frames_inst_01 = Simulation({table: pd.DataFrame(instances["Instance_01"][table]) for table in
+                                       instances["Instance_01"]}, name="Instance 01", run=False, headless=True, seed=1)
+committed_frames_inst_01.decode()
+rescheduled_frames_inst_01 = reschedule(committed_frames_inst_01, now_inst_01, change_inst_01)
+assert (rescheduled_frames_inst_01.z1, rescheduled_frames_inst_01.z2, rescheduled_frames_inst_01.z3) == \
+    rescheduled_objectives_inst_01
@@ -1,8 +1,6 @@
+from src.continuous_casting.profiling import Profile
 from src.continuous_casting.simulation import Simulation
 from src.continuous_casting.utils import get_instances
-import sys
-
-sys.setrecursionlimit(100000)
 
 instances = get_instances()
 
@@ -42,3 +40,66 @@ small_info = {'least_num_charges': {'number': min(instance_data['num_charges']),
                                          max(instance_data['num_stages']))]},
 
               }
+
+decoder = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True)
+objectives_inst_01 = decoder.decode()
+reversed_objectives_inst_01 = decoder.decode(list(reversed(decoder.initial_zeta)))
+
+swapped_zeta_inst_01 = list(decoder.initial_zeta)
+swapped_zeta_inst_01[-1], swapped_zeta_inst_01[-2] = swapped_zeta_inst_01[-2], swapped_zeta_inst_01[-1]
+incremental_objectives_inst_01 = decoder.decode(swapped_zeta_inst_01)
+incremental_schedule_inst_01 = decoder.schedule.copy()
+full_objectives_inst_01 = decoder.decode(swapped_zeta_inst_01, incremental=False)
+assert incremental_objectives_inst_01 == full_objectives_inst_01
+assert (incremental_schedule_inst_01.starting_time == decoder.schedule.starting_time).all()
+assert (incremental_schedule_inst_01.ending_time == decoder.schedule.ending_time).all()
+
+gantt_figure_inst_01 = decoder.plot_gantt(show=False)
+
+
+flexible_decoder = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True,
+                              flexible_casting=True, seed=1)
+flexible_objectives_inst_01 = flexible_decoder.decode(swapped_zeta_inst_01)
+standard_objectives_inst_01 = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True,
+                                         seed=1).decode(swapped_zeta_inst_01)
+assert flexible_objectives_inst_01[1] <= standard_objectives_inst_01[1]
+
+flexible_schedule_inst_01 = flexible_decoder.schedule
+last_stage_inst_01 = flexible_decoder.machines.last_stage
+cast_inst_01 = dict(zip(instances["Instance_01"]["Cast_plan"]["ChargeID"].tolist(),
+                        instances["Instance_01"]["Cast_plan"]["CastID"].tolist()))
+for caster, sequence in flexible_decoder.charges.cc_processing_time["Charge_Sequences"].items():
+    for charge, next_charge in zip(sequence, sequence[1:] + [None]):
+        operation = flexible_schedule_inst_01.operation(charge, last_stage_inst_01)
+        casting_time = flexible_schedule_inst_01.ending_time[operation] - \
+            flexible_schedule_inst_01.starting_time[operation]
+        assert flexible_decoder.charges.process_time(charge, last_stage_inst_01, "MinTime") <= casting_time <= \
+            flexible_decoder.charges.process_time(charge, last_stage_inst_01, "MaxTime")
+
+        if next_charge is not None and cast_inst_01[charge] == cast_inst_01[next_charge]:
+            next_operation = flexible_schedule_inst_01.operation(next_charge, last_stage_inst_01)
+            assert flexible_schedule_inst_01.ending_time[operation] == \
+                flexible_schedule_inst_01.starting_time[next_operation]
+
+# No operation starts before the charge is ready, i.e. before its previous operation ends and it is transported
+for operation in range(1, flexible_schedule_inst_01.num_operations):
+    if flexible_schedule_inst_01.has_next_operation[operation - 1]:
+        ready_time = flexible_schedule_inst_01.ending_time[operation - 1] + flexible_decoder.machines.transport_time(
+            flexible_schedule_inst_01.machine[operation - 1], flexible_schedule_inst_01.machine[operation])
+        assert flexible_schedule_inst_01.starting_time[operation] >= ready_time
+
+seeded_decoder = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True, seed=1)
+seeded_objectives_inst_01 = seeded_decoder.decode()
+assert Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True,
+                  seed=1).decode() == seeded_objectives_inst_01
+
+profile_inst_01 = Profile()
+profiled_decoder = Simulation(instances["Instance_01"], name="Instance 01", run=False, headless=True, seed=1,
+                              profile=profile_inst_01)
+assert profiled_decoder.decode() == seeded_objectives_inst_01
+profile_statistics_inst_01 = profile_inst_01.to_dict()
+
+profile_inst_01.reset()
+assert profiled_decoder.decode(profiled_decoder.initial_zeta) == seeded_objectives_inst_01
+assert profile_inst_01.calls["decode"] == 1
+assert profile_inst_01.counters["computed_allocations"] == 0 and profile_inst_01.counters["reused_allocations"] > 0
@@ -1,42 +1,199 @@
+import csv
 import os
-import pandas as pd
+from collections.abc import Mapping
 
+import numpy as np
 
-def get_instances():
+# Directory of the instances shipped with the package
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Binary cache of the parsed tables, written in each instance folder
+CACHE_FILE = ".instance_cache.npz"
+
+
+def read_columns(columns_path: str):
+    """
+        Function to read the schema of a table from its .columns file
+    Args:
+        columns_path: path to the .columns file
+
+    Returns:
+        columns: dictionary of column type ("INTEGER" or "STRING"), indexed by column name
+    """
+    with open(columns_path, newline="") as file:
+        return {row["name"]: row["type"] for row in csv.DictReader(file)}
+
+
+def read_table(csv_path: str):
+    """
+        Function to read a table of an instance into a structured array, typed by the .columns file next to it.
+        Columns are accessed by name and len() gives the number of rows, as with a DataFrame.
+    Args:
+        csv_path: path to the .csv file
+
+    Returns:
+        table: structured array with one field per column
+    """
+    columns_path = csv_path.replace(".csv", ".columns")
+    columns = read_columns(columns_path) if os.path.isfile(columns_path) else {}
+
+    with open(csv_path, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows = list(reader)
+
+    values = list(zip(*rows)) if rows else [()] * len(header)
+
+    fields = {}
+    for name, column in zip(header, values):
+        if columns.get(name) == "INTEGER":
+            fields[name] = np.array(column, dtype=np.int64)
+
+        else:
+            fields[name] = np.array(column, dtype=str)
+
+    table = np.empty(len(rows), dtype=[(name, field.dtype) for name, field in fields.items()])
+    for name, field in fields.items():
+        table[name] = field
+
+    return table
+
+
+def to_table(table):
+    """
+        Function to convert a table of an instance, e.g. a DataFrame, into a structured array like the ones of
+        read_table. Structured arrays are returned unchanged.
+    Args:
+        table: structured array, or table whose columns are accessed by name (e.g. a DataFrame)
+
+    Returns:
+        table: structured array with one field per column
     """
-        Function to get instance data from continuous_casting/data/Instance_* directory
+    if isinstance(table, np.ndarray) and table.dtype.names is not None:
+        return table
+
+    fields = {}
+    for name in table.columns:
+        field = np.asarray(table[name])
+        fields[name] = field.astype(str) if field.dtype.kind in "OUS" else field
+
+    structured = np.empty(len(table), dtype=[(name, field.dtype) for name, field in fields.items()])
+    for name, field in fields.items():
+        structured[name] = field
+
+    return structured
+
+
+def load_instance(instance_path: str, use_cache: bool = True):
+    """
+        Function to load an instance folder, parsing each of its csv files once.
+
+        The parsed tables are cached in a binary file inside the folder, which is used instead of the csv files
+        until any of them is modified.
+    Args:
+        instance_path: path to the instance folder, e.g. continuous_casting/data/Instance_01
+        use_cache: bool, whether to read and write the binary cache
+
     Returns:
-        instances: dictionary of instances
+        instance: dictionary of tables (structured arrays), indexed by table name
     """
-    # Dictionary of instances
-    instances = {}
+    csv_files = sorted(f for f in os.listdir(instance_path) if
+                       os.path.isfile(os.path.join(instance_path, f)) and f.endswith(".csv"))
+    source_files = [os.path.join(instance_path, f) for f in os.listdir(instance_path) if
+                    f.endswith(".csv") or f.endswith(".columns")]
+
+    cache_path = os.path.join(instance_path, CACHE_FILE)
+    if use_cache and os.path.isfile(cache_path) and \
+            os.path.getmtime(cache_path) >= max(os.path.getmtime(f) for f in source_files):
+        with np.load(cache_path) as cache:
+            return {table: cache[table] for table in cache.files}
+
+    instance = {csv_file.replace(".csv", ""): read_table(os.path.join(instance_path, csv_file)) for csv_file in
+                csv_files}
+
+    if use_cache:
+        # Written to a temporary file first, so that concurrent readers never see a partial cache
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as file:
+                np.savez(file, **instance)
+
+            os.replace(temporary_path, cache_path)
 
-    current_directory = os.getcwd()
-    current_directory = current_directory.split("continuous_casting", 1)
-    current_directory = current_directory[0] + "continuous_casting"
+        except OSError:
+            # Read-only data directory, the instance is parsed again next time
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
 
-    # data_directory = os.path.dirname(current_directory)
-    data_directory = os.path.join(current_directory, "data")
+    return instance
 
-    # List of paths to each instance
-    instance_folders = [f.path for f in os.scandir(data_directory) if f.is_dir() and "Instance_" in f.path]
 
-    # Navigate through instance folders
-    for instance_path in instance_folders:
+class Instances(Mapping):
+    def __init__(self, *paths: str, use_cache: bool = True):
+        """
+            Registry of instances, indexed by instance name. Instance folders are only listed on creation, and an
+            instance is loaded the first time it is accessed.
+        Args:
+            paths: directories of instance folders, or instance folders themselves (continuous_casting/data if none)
+            use_cache: bool, whether to use the binary cache of the instance folders
+        """
+        self.use_cache = use_cache
 
-        # Get all csv files from an instance folder
-        csv_files = [f for f in os.listdir(instance_path) if
-                     os.path.isfile(os.path.join(instance_path, f)) and ".csv" in f]
+        self.__paths = {}
+        self.__instances = {}
 
-        # Get instance name, e.g. 'Instance_01'
-        instance = os.path.basename(os.path.normpath(instance_path))
+        for path in paths or (DATA_DIRECTORY,):
+            self.add(path)
 
-        # Add instance to dictionary of instances
-        instances[instance] = {}
+    def add(self, path: str, name: str = None):
+        """
+            Register an instance folder, or every instance folder of a directory
+        Args:
+            path: directory of instance folders, or instance folder
+            name: string, name of the instance (folder name by default), only for an instance folder
+        """
+        path = os.path.abspath(path)
 
-        for csv_file in csv_files:
-            file_path = os.path.join(instance_path, csv_file)
-            file = pd.read_csv(file_path)
-            instances[instance][csv_file.replace(".csv", "")] = file
+        if self.is_instance_folder(path):
+            self.__paths[name or os.path.basename(os.path.normpath(path))] = path
 
-    return instances
+        else:
+            for folder in sorted(f.path for f in os.scandir(path) if f.is_dir() and self.is_instance_folder(f.path)):
+                self.__paths[os.path.basename(folder)] = folder
+
+    @staticmethod
+    def is_instance_folder(path: str):
+        """
+            Check whether a folder holds an instance, i.e. its cast plan
+        """
+        return os.path.isfile(os.path.join(path, "Cast_plan.csv"))
+
+    def path(self, name: str):
+        """
+            Get the folder of an instance
+        """
+        return self.__paths[name]
+
+    def __getitem__(self, name: str):
+        if name not in self.__instances:
+            self.__instances[name] = load_instance(self.__paths[name], self.use_cache)
+
+        return self.__instances[name]
+
+    def __iter__(self):
+        return iter(self.__paths)
+
+    def __len__(self):
+        return len(self.__paths)
+
+
+def get_instances(*paths: str):
+    """
+        Function to get instance data from continuous_casting/data/Instance_* directory, or from other paths
+    Args:
+        paths: directories of instance folders, or instance folders themselves (optional)
+
+    Returns:
+        instances: registry of instances, loaded on access
+    """
+    return Instances(*paths)